@@ -0,0 +1,116 @@
+"""
+Model artifact storage shared by every task.
+
+Artifacts are written with joblib, optionally compressed, next to a JSON
+sidecar (`<path>.meta.json`) recording the feature names, library versions,
+compression level and a SHA-256 checksum. Uncompressed artifacts can be
+loaded memory-mapped, so several worker processes share one copy of the
+large NumPy arrays in the OS page cache instead of each holding its own.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+import warnings
+
+import joblib
+
+META_SUFFIX = ".meta.json"
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _versions():
+    versions = {"python": platform.python_version(), "joblib": joblib.__version__}
+    for name in ("numpy", "pandas", "sklearn"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def read_metadata(path):
+    meta_path = str(path) + META_SUFFIX
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def save_artifact(obj, path, compress=0, metadata=None):
+    """
+    Dump `obj` to `path` and write its metadata sidecar.
+
+    Args:
+        compress (int): joblib/zlib compression level, 0 (none, mmap-able)
+            to 9 (smallest, slowest to load).
+        metadata (dict): Extra fields for the sidecar, e.g. "feature_names".
+            By default these are taken from `obj.feature_names_in_`.
+
+    Returns:
+        dict: The metadata written.
+    """
+    dirname = os.path.dirname(str(path))
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    joblib.dump(obj, path, compress=compress)
+
+    meta = {
+        "type": f"{type(obj).__module__}.{type(obj).__name__}",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "compress": compress,
+        "size_bytes": os.path.getsize(path),
+        "sha256": _sha256(path),
+        "versions": _versions(),
+    }
+    if hasattr(obj, "feature_names_in_"):
+        meta["feature_names"] = [str(f) for f in obj.feature_names_in_]
+    meta.update(metadata or {})
+
+    with open(str(path) + META_SUFFIX, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_artifact(path, mmap=False, verify=False):
+    """
+    Load an artifact saved by `save_artifact` (or a plain joblib/pickle file).
+
+    The file size is always checked against the sidecar. The full checksum
+    reads the whole file before loading it, which defeats memory-mapping,
+    so it is only computed on request.
+
+    Args:
+        mmap (bool): Memory-map NumPy arrays read-only instead of copying
+            them into the process. Ignored for compressed artifacts.
+        verify (bool): Also check the file against the sidecar checksum.
+    """
+    meta = read_metadata(path)
+    if meta is not None:
+        if os.path.getsize(path) != meta["size_bytes"]:
+            raise ValueError(f"Size mismatch for {path}; the file was modified")
+        if verify and _sha256(path) != meta["sha256"]:
+            raise ValueError(f"Checksum mismatch for {path}; the file was modified")
+        saved = meta["versions"].get("sklearn")
+        current = _versions().get("sklearn")
+        if saved and current and saved != current:
+            logging.warning(
+                f"{path} was saved with scikit-learn {saved}, running {current}"
+            )
+        if mmap and meta.get("compress"):
+            mmap = False
+
+    with warnings.catch_warnings():
+        # joblib warns when asked to mmap a file that was not dumped for it
+        warnings.simplefilter("ignore", UserWarning)
+        return joblib.load(path, mmap_mode="r" if mmap else None)
@@ -0,0 +1,128 @@
+"""
+Compare artifact formats by file size, load time and memory.
+
+Every load runs in a fresh interpreter, so the numbers are not skewed by
+earlier loads or by the page cache of this process. Run from the repository
+root:
+
+    python -m common.benchmark_artifacts --artifact task5/models/model.pkl
+
+Without `--artifact`, a random forest is trained on synthetic data.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+
+from common.artifacts import load_artifact, save_artifact
+
+FORMATS = [
+    # (label, compress, mmap)
+    ("raw", 0, False),
+    ("raw+mmap", 0, True),
+    ("zlib-3", 3, False),
+    ("zlib-9", 9, False),
+    ("lzma-3", ("lzma", 3), False),
+]
+
+
+def memory_kb():
+    # Linux reports private (anonymous) memory separately from file-backed
+    # pages; that split is what shows the effect of memory-mapping
+    if os.path.exists("/proc/self/status"):
+        fields = {}
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                fields[key] = value.split()[0] if value.split() else "0"
+        return {"rss": int(fields["VmRSS"]), "anon": int(fields.get("RssAnon", 0))}
+    import resource
+
+    return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "anon": 0}
+
+
+def child(path, mmap):
+    # Import the heavy libraries first so they are not charged to the load
+    import numpy  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+
+    before = memory_kb()
+    start = time.perf_counter()
+    obj = load_artifact(path, mmap=mmap)
+    seconds = time.perf_counter() - start
+    after = memory_kb()  # while `obj` is still alive
+    del obj
+    print(
+        json.dumps(
+            {
+                "load_s": seconds,
+                "rss_mb": (after["rss"] - before["rss"]) / 1024,
+                "anon_mb": (after["anon"] - before["anon"]) / 1024,
+            }
+        )
+    )
+
+
+def measure(path, mmap, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-m", "common.benchmark_artifacts", "--child", path]
+            + (["--mmap"] if mmap else []),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        runs.append(json.loads(out.stdout))
+    # Best of `repeats` for time; memory is stable between runs
+    return min(runs, key=lambda r: r["load_s"])
+
+
+def synthetic_model(rows, trees):
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = make_classification(n_samples=rows, n_features=30, random_state=42)
+    return RandomForestClassifier(n_estimators=trees, random_state=42).fit(X, y)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Benchmark artifact formats")
+    parser.add_argument("--artifact", help="existing joblib/pickle file to re-save")
+    parser.add_argument("--rows", type=int, default=50_000, help="synthetic rows")
+    parser.add_argument("--trees", type=int, default=100, help="synthetic trees")
+    parser.add_argument("--repeats", type=int, default=3, help="loads per format")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mmap", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.mmap)
+        sys.exit()
+
+    if args.artifact:
+        obj = joblib.load(args.artifact)
+    else:
+        print(f"Training a {args.trees}-tree forest on {args.rows} synthetic rows...")
+        obj = synthetic_model(args.rows, args.trees)
+
+    print(
+        f"\n{'format':<10}{'size MB':>10}{'load s':>10}{'RSS MB':>10}{'private MB':>12}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, compress, mmap in FORMATS:
+            path = os.path.join(tmp, f"{label.split('+')[0]}.pkl")
+            if not os.path.exists(path):
+                save_artifact(obj, path, compress=compress)
+            result = measure(path, mmap, args.repeats)
+            size = os.path.getsize(path) / 2**20
+            print(
+                f"{label:<10}{size:>10.2f}{result['load_s']:>10.3f}"
+                f"{result['rss_mb']:>10.1f}{result['anon_mb']:>12.1f}"
+            )
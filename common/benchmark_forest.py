@@ -0,0 +1,117 @@
+"""
+Throughput of `CompiledForest` against the sklearn model it was built from.
+
+Run from the repository root, either on a synthetic forest or on a saved
+model together with a CSV of rows it accepts:
+
+    python -m common.benchmark_forest
+    python -m common.benchmark_forest --artifact task1/titanic_model.pkl \
+        --data task1/Titanic-Dataset.csv
+
+Every batch size is checked for exact prediction parity before timing. A
+depth-limited multiclass forest, whose impure leaves hold class fractions
+that need not sum to exactly one, is checked as well.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from common.artifacts import load_artifact
+from common.forest import compile_forest
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def rows_per_second(predict, X, min_seconds):
+    # Repeat small batches until the timing is long enough to be stable
+    runs, start = 0, time.perf_counter()
+    while True:
+        predict(X)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return runs * len(X) / elapsed
+
+
+def take_rows(pool, n, rng):
+    idx = rng.integers(0, len(pool), n)
+    return pool.iloc[idx] if isinstance(pool, pd.DataFrame) else pool[idx]
+
+
+def synthetic(rows, trees, n_classes=2, max_depth=None):
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = make_classification(
+        n_samples=rows * 2,
+        n_features=30,
+        n_informative=10,
+        n_classes=n_classes,
+        random_state=42,
+    )
+    model = RandomForestClassifier(
+        n_estimators=trees, max_depth=max_depth, random_state=42, n_jobs=1
+    )
+    return model.fit(X[:rows], y[:rows]), X[rows:]
+
+
+def check_parity(model, compiled, X, n_jobs=1):
+    # Exact parity, including class probabilities for classifiers
+    assert np.array_equal(model.predict(X), compiled.predict(X, n_jobs=n_jobs))
+    if compiled.classes_ is not None:
+        assert np.array_equal(
+            model.predict_proba(X), compiled.predict_proba(X, n_jobs=n_jobs)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Benchmark compiled forest inference")
+    parser.add_argument("--artifact", help="saved forest or pipeline ending in one")
+    parser.add_argument("--data", help="CSV of rows the artifact can score")
+    parser.add_argument("--rows", type=int, default=20_000, help="synthetic rows")
+    parser.add_argument("--trees", type=int, default=100, help="synthetic trees")
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=BATCH_SIZES, help="rows per call"
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.5, help="timing budget per batch size"
+    )
+    parser.add_argument(
+        "--n-jobs", type=int, default=1, help="threads for the compiled forest"
+    )
+    args = parser.parse_args()
+
+    if args.artifact:
+        model = load_artifact(args.artifact)
+        pool = pd.read_csv(args.data)
+        if hasattr(model, "feature_names_in_"):
+            pool = pool[list(model.feature_names_in_)]
+    else:
+        print(f"Training a {args.trees}-tree forest on {args.rows} synthetic rows...")
+        model, pool = synthetic(args.rows, args.trees)
+
+    start = time.perf_counter()
+    compiled = compile_forest(model)
+    print(
+        f"Compiled {compiled.n_trees} trees, {len(compiled.left):,} nodes "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    shallow, shallow_X = synthetic(2_000, 50, n_classes=5, max_depth=4)
+    check_parity(shallow, compile_forest(shallow), shallow_X, n_jobs=args.n_jobs)
+    print("Parity holds for a depth-limited 5-class forest")
+
+    rng = np.random.default_rng(42)
+    print(f"\n{'batch':>10}{'sklearn rows/s':>16}{'compiled rows/s':>17}{'speedup':>9}")
+    for size in args.batch_sizes:
+        X = take_rows(pool, size, rng)
+        check_parity(model, compiled, X, n_jobs=args.n_jobs)
+
+        sk = rows_per_second(model.predict, X, args.min_seconds)
+        ours = rows_per_second(
+            lambda b: compiled.predict(b, n_jobs=args.n_jobs), X, args.min_seconds
+        )
+        print(f"{size:>10,}{sk:>16,.0f}{ours:>17,.0f}{ours / sk:>8.2f}x")
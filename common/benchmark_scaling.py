@@ -0,0 +1,342 @@
+"""
+Scaling benchmark of every task pipeline on synthetic data.
+
+    python -m common.benchmark_scaling                          # all tasks
+    python -m common.benchmark_scaling --tasks task2 --sizes 1000 100000 1000000
+    python -m common.benchmark_scaling --sizes 1000 10000 --save-baseline
+
+For each task and row count, a dataset is generated with `common.synthetic`
+(and kept under `.cache/synthetic/` for reuse). Its Arrow dataset cache is
+deleted, so every load stage is a cold load that parses the CSV and builds
+the cache. The task's stage functions then run on it in a fresh interpreter,
+under `common.instrument` without allocation tracing:
+
+- task1 (Titanic): load, fit (`build_pipeline().fit`), predict
+- task2 (IMDb): load (`load_raw_data`), preprocess (`preprocess_raw`),
+  features (`build_features`), fit (`train_model`, halving search), predict
+- task3 (Iris): load, preprocess, fit (`build_model`), predict
+- task5 (creditcard): preprocess (`load_and_preprocess_data`, with its load
+  stage), fit (`train_model`), predict (`score_batch` on every row)
+
+Each stage reports seconds and rows/s from that untraced run. A second,
+traced run (skipped with `--no-memory`) adds each stage's tracemalloc peak
+MB; tracing slows the stages, so its times are discarded. The "total" record
+covers the whole child run, imports included, and adds its peak RSS where
+the `resource` module exists (not on Windows). Results are written as
+JSON to `metrics/scaling-<time>.json`, one record per (task, rows, stage),
+with the machine and library versions they were measured with.
+
+Absolute times only mean something on the machine that produced them, so
+the baseline is not committed: `--save-baseline` writes it to
+`BASELINE_PATH` under the git-ignored `metrics/`. Later runs are compared
+with it only when the machine and versions match. Stages that take longer
+than `--tolerance` over the baseline are then listed, and the exit status
+is 1 if there are any.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import instrument, synthetic
+from common.artifacts import _versions
+from common.datasets import CACHE_DIRNAME
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / ".cache" / "synthetic"
+BASELINE_PATH = ROOT / instrument.METRICS_DIRNAME / "scaling_baseline.json"
+
+TASKS = {"task1": "titanic", "task2": "imdb", "task3": "iris", "task5": "creditcard"}
+SIZES = [1_000, 10_000, 100_000]
+
+# Baseline stages faster than this are too noisy to flag
+MIN_SECONDS = 0.05
+
+
+def dataset(task, rows, seed=0):
+    """Generate (or reuse) the synthetic CSV for `task` at `rows` rows."""
+    kind = TASKS[task]
+    # task2 reads a folder of raw CSVs; task5 reads data/creditcard.csv
+    names = {"imdb": "raw/imdb.csv", "creditcard": "data/creditcard.csv"}
+    path = DATA_DIR / f"{kind}-{rows}-{seed}" / names.get(kind, f"{kind}.csv")
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        synthetic.write_csv(kind, tmp, rows, seed)
+        tmp.replace(path)
+    return path
+
+
+def machine():
+    """CPU count, architecture and CPU model the benchmark runs on."""
+    cpu = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo") as f:
+            models = [
+                line.split(":", 1)[1] for line in f if line.startswith("model name")
+            ]
+        cpu = models[0].strip() if models else cpu
+    return {"cpus": os.cpu_count(), "arch": platform.machine(), "cpu": cpu}
+
+
+def _task1(path):
+    sys.path.insert(0, str(ROOT / "task1"))
+    from pipeline import FEATURES, TARGET, build_pipeline
+    from common.datasets import load_csv
+
+    with instrument.stage("load"):
+        df = load_csv(path, columns=FEATURES + [TARGET])
+    with instrument.stage("fit"):
+        model = build_pipeline().fit(df[FEATURES], df[TARGET])
+    with instrument.stage("predict"):
+        model.predict(df[FEATURES])
+
+
+def _task2(path):
+    sys.path.insert(0, str(ROOT / "task2" / "src"))
+    from data_loader import load_raw_data
+    from features import build_features
+    from preprocess import preprocess_raw
+    from train import train_model
+
+    with instrument.stage("load"):
+        df = load_raw_data(path.parent, workers=1)
+    with instrument.stage("preprocess"):
+        df = preprocess_raw(df)
+    with instrument.stage("features"):
+        df = build_features(df)
+    X, y = df.drop(columns=["Rating"]), df["Rating"]
+    with instrument.stage("fit"):
+        model = train_model(X, y, search="halving")
+    with instrument.stage("predict"):
+        model.predict(X)
+
+
+def _task3(path):
+    sys.path.insert(0, str(ROOT / "task3"))
+    from utils import build_model, preprocess
+    from common.datasets import load_csv
+
+    with instrument.stage("load"):
+        df = load_csv(path)
+    with instrument.stage("preprocess"):
+        X, y, _ = preprocess(df)
+    with instrument.stage("fit"):
+        model = build_model("RandomForest", random_state=42).fit(X, y)
+    with instrument.stage("predict"):
+        model.predict(X)
+
+
+def _task5(path):
+    # The task5 modules read data/creditcard.csv relative to the working dir
+    os.chdir(path.parents[1])
+    sys.path.insert(0, str(ROOT / "task5"))
+    import numpy as np
+    from src.preprocess import FEATURE_COLUMNS, load_and_preprocess_data
+    from src.score import score_batch
+    from src.train import build_pipeline, train_model
+    from common.datasets import load_csv
+
+    # Both functions are instrumented: load + preprocess, and fit
+    X_train, _, y_train, _, scaler = load_and_preprocess_data()
+    model = train_model(X_train, y_train, model_type="logreg")
+    X = load_csv(path, columns=FEATURE_COLUMNS).to_numpy(dtype=np.float32)
+    with instrument.stage("predict"):
+        score_batch(build_pipeline(model, scaler), X, copy=False)
+
+
+def max_rss_mb():
+    """Peak RSS of this process in MB, or None where `resource` is missing."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return rss / (2**20 if sys.platform == "darwin" else 1024)
+
+
+def run_child(task, path, out_dir, memory=False):
+    """Run one task's stages in this process and record them to `out_dir`."""
+    with instrument.run(task, out_dir=out_dir, memory=memory) as run:
+        globals()[f"_{task}"](Path(path))
+        run.record(max_rss_mb=max_rss_mb())
+
+
+def _child(task, path, memory=False):
+    # One cold run of `task` in a fresh interpreter; returns its metrics
+    shutil.rmtree(path.parent / CACHE_DIRNAME, ignore_errors=True)
+    module = "common.benchmark_scaling"
+    with tempfile.TemporaryDirectory() as out_dir:
+        subprocess.run(
+            [sys.executable, "-m", module, "--child", task, str(path), out_dir]
+            + (["--memory"] if memory else []),
+            check=True,
+            env=dict(os.environ, PYTHONPATH=str(ROOT)),
+            stdout=subprocess.DEVNULL,
+        )
+        (metrics_file,) = Path(out_dir).glob("*.json")
+        return json.loads(metrics_file.read_text())
+
+
+def measure(task, rows, seed=0, memory=True):
+    """
+    Benchmark `task` at `rows` rows: time it untraced, then, with `memory`,
+    run it again under tracemalloc for the peak MB of each stage.
+    """
+    path = dataset(task, rows, seed)
+    metrics = _child(task, path)
+    traced = _child(task, path, memory=True) if memory else None
+    peaks = {s["name"]: s["peak_mb"] for s in traced["stages"]} if traced else {}
+
+    records = [
+        {
+            "task": task,
+            "rows": rows,
+            "stage": s["name"],
+            "calls": s["calls"],
+            "seconds": s["seconds"],
+            "rows_per_sec": rows / s["seconds"] if s["seconds"] else None,
+            "peak_mb": peaks.get(s["name"]),
+        }
+        for s in metrics["stages"]
+    ]
+    records.append(
+        {
+            "task": task,
+            "rows": rows,
+            "stage": "total",
+            "calls": 1,
+            "seconds": metrics["seconds"],
+            "rows_per_sec": rows / metrics["seconds"],
+            "peak_mb": traced["peak_mb"] if traced else None,
+            "max_rss_mb": metrics["values"]["max_rss_mb"],
+        }
+    )
+    return records
+
+
+def mismatch(report, baseline):
+    """Why `baseline` cannot be compared with `report`, or None if it can."""
+    for field in ("machine", "versions"):
+        if baseline.get(field) != report[field]:
+            return f"{field} {baseline.get(field)} != {report[field]}"
+    return None
+
+
+def compare(results, baseline, tolerance):
+    """Records whose time grew by more than `tolerance` over the baseline."""
+    key = lambda r: (r["task"], r["rows"], r["stage"])  # noqa: E731
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = base.get(key(r))
+        if old is None or old["seconds"] < MIN_SECONDS:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {**r, "baseline_seconds": old["seconds"], "ratio": ratio}
+            )
+    return regressions
+
+
+def _mb(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_results(results):
+    print(
+        f"{'task':<7}{'rows':>11}  {'stage':<11}"
+        f"{'seconds':>9}{'rows/s':>13}{'peak MB':>9}{'RSS MB':>9}"
+    )
+    for r in results:
+        speed = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] else "-"
+        print(
+            f"{r['task']:<7}{r['rows']:>11,}  {r['stage']:<11}"
+            f"{r['seconds']:>9.3f}{speed:>13}"
+            f"{_mb(r.get('peak_mb')):>9}{_mb(r.get('max_rss_mb')):>9}"
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_child(*sys.argv[2:5], memory=sys.argv[5:6] == ["--memory"])
+        sys.exit()
+
+    parser = argparse.ArgumentParser("Time every task pipeline on synthetic data")
+    parser.add_argument(
+        "--tasks", nargs="+", choices=list(TASKS), default=list(TASKS)
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=SIZES, help="row counts to run"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip the traced run that measures each stage's peak MB",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=None,
+        help="results JSON (default: metrics/scaling-<time>.json)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write the results as the new baseline instead of comparing",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for task in args.tasks:
+        for rows in args.sizes:
+            print(f"{task} at {rows:,} rows...", file=sys.stderr)
+            results += measure(task, rows, args.seed, memory=not args.no_memory)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": machine(),
+        "seed": args.seed,
+        "versions": _versions(),
+        "results": results,
+    }
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    out = args.out or Path(instrument.METRICS_DIRNAME) / f"scaling-{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print_results(results)
+    print(f"\nResults saved to {out}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+    elif not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+    elif reason := mismatch(report, json.loads(args.baseline.read_text())):
+        print(f"Baseline not comparable ({reason}); record one on this machine")
+    else:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['task']} {r['rows']:,} rows {r['stage']}: "
+                f"{r['baseline_seconds']:.3f}s -> {r['seconds']:.3f}s "
+                f"({r['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than {1 + args.tolerance:.2f}x the baseline")
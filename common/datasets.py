@@ -0,0 +1,144 @@
+"""
+CSV loading through a memory-mapped columnar cache.
+
+The first `load_csv` of a file parses it with `pd.read_csv` as usual and
+stores the typed result as an uncompressed Arrow IPC (Feather v2) file in a
+`.cache/` folder next to the CSV. Later loads memory-map that file instead of
+parsing text. Numeric columns without missing values come back zero-copy:
+their pages are shared with the OS page cache, and are only read from disk
+once touched. With `columns`, only those columns are mapped at all.
+
+Cache entries are named `<stem>-<options>-<version>.arrow`. `options` hashes
+the CSV's file name and the `read_csv` arguments, so each way of parsing a
+file has its own entry. `version` hashes the CSV's size and modification time
+(or its SHA-256 with `key="hash"`). Editing the file builds a new version and
+removes the old ones of the same file and options only, so other files that
+share a name prefix, or other parse options of the same file, keep theirs.
+
+Zero-copy columns are read-only NumPy arrays. Replacing a column works as
+usual, but writing into one in place raises; `.copy()` the frame first if a
+caller needs that.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+CACHE_DIRNAME = ".cache"
+
+
+def _options(path: Path, read_kwargs: dict) -> str:
+    h = hashlib.sha256(path.name.encode())
+    h.update(json.dumps(read_kwargs, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def _version(path: Path, key: str) -> str:
+    h = hashlib.sha256()
+    if key == "hash":
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    elif key == "mtime":
+        stat = path.stat()
+        h.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    else:
+        raise ValueError(f"Unknown cache key {key!r}, expected 'mtime' or 'hash'")
+    return h.hexdigest()[:16]
+
+
+def cache_path(path, key="mtime", **read_kwargs) -> Path:
+    path = Path(path)
+    options = _options(path, read_kwargs)
+    version = _version(path, key)
+    return path.parent / CACHE_DIRNAME / f"{path.stem}-{options}-{version}.arrow"
+
+
+def build_cache(path, key="mtime", **read_kwargs) -> Path:
+    """Parse `path` once and write its cache entry, replacing stale ones."""
+    path = Path(path)
+    out = cache_path(path, key, **read_kwargs)
+    out.parent.mkdir(exist_ok=True)
+    # Older versions of this file with these options, and nothing else
+    options = _options(path, read_kwargs)
+    pattern = re.compile(rf"{re.escape(path.stem)}-{options}-[0-9a-f]{{16}}\.arrow")
+    for stale in out.parent.glob(f"{glob.escape(path.stem)}-{options}-*.arrow"):
+        if stale != out and pattern.fullmatch(stale.name):
+            stale.unlink(missing_ok=True)
+
+    df = pd.read_csv(path, **read_kwargs)
+    # Write under a temporary name so a crash never leaves a truncated entry
+    tmp = out.with_suffix(f".{os.getpid()}.tmp")
+    feather.write_feather(df, tmp, compression="uncompressed")
+    tmp.replace(out)
+    return out
+
+
+def load_csv(path, columns=None, key="mtime", **read_kwargs) -> pd.DataFrame:
+    """
+    Load a CSV through its columnar cache, building the cache if needed.
+
+    Args:
+        path: CSV file.
+        columns (list): Columns to load; the rest are never read.
+        key (str): "mtime" (size + modification time, cheap) or "hash"
+            (SHA-256 of the contents) to detect a changed file.
+        **read_kwargs: Passed to `pd.read_csv` when the cache is built,
+            e.g. `encoding`. Part of the cache key. Use `columns` rather
+            than `usecols` to select columns.
+
+    Returns:
+        pd.DataFrame: Equal to `pd.read_csv(path, **read_kwargs)[columns]`.
+    """
+    cached = cache_path(path, key, **read_kwargs)
+    if not cached.exists():
+        cached = build_cache(path, key, **read_kwargs)
+
+    table = feather.read_table(cached, columns=columns, memory_map=True)
+    # One block per column keeps numeric columns as views of the mapped file
+    df = table.to_pandas(split_blocks=True)
+    # Arrow hands back missing strings as None; read_csv gives NaN
+    text = df.select_dtypes(include=["object", "string"]).columns
+    if len(text):
+        df[text] = df[text].fillna(np.nan)
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser("Build dataset caches and time CSV vs cache loads")
+    parser.add_argument("paths", nargs="+", help="CSV files")
+    parser.add_argument("--encoding", default=None, help="CSV encoding")
+    args = parser.parse_args()
+
+    kwargs = {"encoding": args.encoding} if args.encoding else {}
+    print(f"{'file':<28}{'read_csv s':>11}{'build s':>9}{'cached s':>10}{'1 column s':>11}")
+    for path in args.paths:
+        start = time.perf_counter()
+        expected = pd.read_csv(path, **kwargs)
+        t_csv = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_cache(path, **kwargs)
+        t_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = load_csv(path, **kwargs)
+        t_cached = time.perf_counter() - start
+        pd.testing.assert_frame_equal(df, expected)
+
+        start = time.perf_counter()
+        load_csv(path, columns=[expected.columns[-1]], **kwargs)
+        t_column = time.perf_counter() - start
+
+        name = Path(path).name
+        print(f"{name:<28}{t_csv:>11.3f}{t_build:>9.3f}{t_cached:>10.4f}{t_column:>11.4f}")
@@ -0,0 +1,245 @@
+"""
+Flattened random forest inference.
+
+`compile_forest` copies the nodes of every tree in a fitted random forest into
+one set of contiguous NumPy arrays: split feature, threshold, left child and
+per-node leaf values. Prediction then advances every (row, tree) pair one
+level per step with a handful of vectorized gathers, instead of one
+Python-level `predict` call per estimator.
+
+Predictions match the sklearn model bit for bit. Comparisons are made on
+float32 inputs, as in sklearn, with thresholds rounded down to float32
+so that `x <= threshold` is unchanged. NaNs follow each split's learned
+missing-value direction, and tree outputs are summed in estimator order
+before averaging. Classifier leaf rows are taken from each tree's own
+`predict_proba`, so they carry whatever per-leaf normalisation the installed
+sklearn applies to impure leaves.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+# Row x tree cells processed per block; bounds the working memory per thread
+BLOCK_CELLS = 1 << 20
+
+# Levels advanced between dropping the (row, tree) cells that reached a leaf
+COMPACT_EVERY = 4
+
+
+class CompiledForest:
+    """
+    A random forest flattened into node arrays.
+
+    Nodes are numbered breadth-first per tree, so the right child of a split
+    is always `left + 1` and the next node is `left + (x > threshold)`.
+    Leaves point to themselves with an infinite threshold, so extra steps
+    past a leaf are harmless. Tree `t` starts at node `roots[t]`.
+
+    `preprocess` is the part of a pipeline in front of the forest, applied
+    before traversal.
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        nan_right,
+        value,
+        roots,
+        classes=None,
+        preprocess=None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.nan_right = nan_right
+        self.value = value
+        self.roots = roots
+        self.is_leaf = left == np.arange(len(left))
+        self.classes_ = classes
+        self.preprocess = preprocess
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _leaves(self, X):
+        # (rows, trees) leaf node reached by each row in each tree
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = np.isnan(flat_X).any()
+        leaves = np.empty(n_rows * self.n_trees, dtype=np.int32)
+        cell = np.arange(n_rows * self.n_trees, dtype=np.int32)
+        node = np.tile(self.roots, n_rows)
+        offset = np.repeat(
+            np.arange(n_rows, dtype=np.int32) * n_features, self.n_trees
+        )
+
+        while len(cell):
+            for _ in range(COMPACT_EVERY):
+                x = flat_X[offset + self.feature[node]]
+                step = x > self.threshold[node]
+                if has_nan:
+                    step |= np.isnan(x) & self.nan_right[node]
+                node = self.left[node] + step
+            done = self.is_leaf[node]
+            leaves[cell[done]] = node[done]
+            keep = ~done
+            cell, node, offset = cell[keep], node[keep], offset[keep]
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def _average(self, X):
+        leaves = self._leaves(X)
+        out = np.zeros((len(X), self.value.shape[1]))
+        # Tree by tree, in the order sklearn accumulates them
+        for t in range(self.n_trees):
+            out += self.value[leaves[:, t]]
+        out /= self.n_trees
+        return out
+
+    def _run(self, X, n_jobs):
+        if self.preprocess is not None:
+            X = self.preprocess.transform(X)
+        if sp.issparse(X):
+            X = X.toarray()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        block = max(1, BLOCK_CELLS // self.n_trees)
+        blocks = [X[i : i + block] for i in range(0, len(X), block)]
+        if not blocks:
+            return np.zeros((0, self.value.shape[1]))
+        if n_jobs == 1 or len(blocks) == 1:
+            return np.concatenate([self._average(b) for b in blocks])
+        # NumPy releases the GIL in the gathers, so blocks run in parallel
+        with ThreadPoolExecutor(n_jobs) as pool:
+            return np.concatenate(list(pool.map(self._average, blocks)))
+
+    def predict_proba(self, X, n_jobs=1):
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._run(X, n_jobs)
+
+    def predict(self, X, n_jobs=1):
+        out = self._run(X, n_jobs)
+        if self.classes_ is None:
+            return out[:, 0]
+        return self.classes_.take(np.argmax(out, axis=1))
+
+
+def _breadth_first(tree):
+    # Old node ids in breadth-first order, the two children of a split adjacent
+    order = [np.array([0])]
+    frontier = order[0]
+    while len(frontier):
+        split = frontier[tree.children_left[frontier] != -1]
+        frontier = np.column_stack(
+            [tree.children_left[split], tree.children_right[split]]
+        ).ravel()
+        order.append(frontier)
+    return np.concatenate(order)
+
+
+def _round_down_f32(threshold):
+    # Largest float32 <= threshold, so float32 `x <= t32` iff `x <= threshold`
+    t32 = threshold.astype(np.float32)
+    too_big = t32.astype(np.float64) > threshold
+    t32[too_big] = np.nextafter(t32[too_big], np.float32(-np.inf))
+    return t32
+
+
+def _leaf_points(tree, n_features):
+    # One float32 row per node that reaches it, from the split bounds on its path
+    lo = np.full((tree.node_count, n_features), -np.inf)
+    hi = np.full((tree.node_count, n_features), np.inf)
+    nan = np.zeros((tree.node_count, n_features), dtype=bool)
+    frontier = np.array([0])
+    while len(frontier):
+        split = frontier[tree.children_left[frontier] != -1]
+        left, right = tree.children_left[split], tree.children_right[split]
+        f, t = tree.feature[split], tree.threshold[split]
+        for child in (left, right):
+            lo[child], hi[child], nan[child] = lo[split], hi[split], nan[split]
+        hi[left, f] = np.minimum(hi[split, f], t)
+        lo[right, f] = np.maximum(lo[split, f], t)
+        # An infinite threshold splits missing values from the rest
+        nan[right, f] |= np.isinf(t)
+        frontier = np.concatenate([left, right])
+
+    # x <= hi via rounding hi down; x > lo via the next float32 above lo
+    points = np.zeros((tree.node_count, n_features), dtype=np.float32)
+    above = np.isfinite(lo)
+    points[above] = np.nextafter(_round_down_f32(lo[above]), np.float32(np.inf))
+    below = np.isfinite(hi)
+    points[below] = _round_down_f32(hi[below])
+    points[nan] = np.nan
+    return points
+
+
+def _leaf_proba(est, order, is_leaf):
+    # Leaf rows exactly as `est.predict_proba` returns them, renormalised or not
+    leaves = order[is_leaf]
+    points = _leaf_points(est.tree_, est.n_features_in_)[leaves]
+    if not np.array_equal(est.apply(points), leaves):
+        raise RuntimeError("Could not construct an input reaching every leaf")
+    value = est.tree_.value[order, 0, :].copy()
+    value[is_leaf] = est.predict_proba(points)
+    return value
+
+
+def compile_forest(model):
+    """
+    Flatten a fitted `RandomForestClassifier`/`RandomForestRegressor`, or a
+    `Pipeline` ending in one, into a `CompiledForest`.
+    """
+    preprocess = None
+    if isinstance(model, Pipeline):
+        preprocess = model[:-1] if len(model) > 1 else None
+        model = model[-1]
+    if not isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+        raise TypeError(
+            f"Cannot compile a {type(model).__name__}, expected a random forest"
+        )
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    feature, threshold, left, nan_right, value, roots = ([] for _ in range(6))
+    offset = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        order = _breadth_first(tree)
+        new_id = np.empty(tree.node_count, dtype=np.int64)
+        new_id[order] = np.arange(tree.node_count) + offset
+
+        is_leaf = tree.children_left[order] == -1
+        feature.append(np.where(is_leaf, 0, tree.feature[order]))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+        left.append(
+            np.where(is_leaf, new_id[order], new_id[tree.children_left[order]])
+        )
+        nan_right.append(~is_leaf & ~tree.missing_go_to_left[order].astype(bool))
+        # Class probabilities for classifiers, the mean target for regressors
+        if isinstance(model, RandomForestClassifier):
+            value.append(_leaf_proba(est, order, is_leaf))
+        else:
+            value.append(tree.value[order, 0, :])
+
+        roots.append(offset)
+        offset += tree.node_count
+
+    if offset >= np.iinfo(np.int32).max:
+        raise ValueError("Forest has too many nodes to compile")
+
+    return CompiledForest(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=_round_down_f32(np.concatenate(threshold)),
+        left=np.concatenate(left).astype(np.int32),
+        nan_right=np.concatenate(nan_right),
+        value=np.ascontiguousarray(np.concatenate(value)),
+        roots=np.array(roots, dtype=np.int32),
+        classes=model.classes_ if isinstance(model, RandomForestClassifier) else None,
+        preprocess=preprocess,
+    )
@@ -0,0 +1,291 @@
+"""
+Stage timing, peak memory and profiling for the task pipelines.
+
+A run collects the stages executed inside it and writes one JSON file when it
+ends, whether it succeeded or not:
+
+    with instrument.run(
+        "train", out_dir="metrics", profile=args.profile, memory=args.memory
+    ) as r:
+        with instrument.stage("load"):
+            df = load_csv(path)
+        model = fit(X, y)  # decorated with @instrument.timed("fit")
+        r.record(accuracy=acc)
+
+Stages are named after the pipeline step they cover: load, preprocess,
+features, fit, predict and save. A stage entered several times (per chunk,
+per fold) is reported once with its call count and total time. Nested stages
+also count toward their parent.
+
+With `memory=True` (the `--memory` flag), peak memory is also recorded: the
+tracemalloc peak above what was allocated when the stage started, i.e. the
+most the stage itself held at once. It sees Python objects and NumPy
+buffers. It misses memory that compiled code allocates itself (scikit-learn's
+tree builders, for one) and child processes such as joblib workers. Tracing
+slows allocation-heavy code noticeably, so it is off by default and the
+timings of a traced run should not be compared with untraced ones.
+Outside a run, stages still time themselves and log the result, so library
+code can be instrumented unconditionally. Stages are not thread-safe; open
+them from one thread.
+
+With `profile=True` the run is also profiled with cProfile, and the stats are
+dumped next to the JSON file for `python -m pstats` or snakeviz.
+
+    python -m common.instrument metrics/train-A.json metrics/train-B.json
+
+compares two runs stage by stage.
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common.artifacts import _versions
+
+METRICS_DIRNAME = "metrics"
+STAGES = ("load", "preprocess", "features", "fit", "predict", "save")
+
+_MB = 2**20
+
+# The run being recorded, and the open frames as [allocated at start, peak]
+_active = None
+_frames = []
+
+
+def _push():
+    # Open a frame; the enclosing one keeps the peak reached so far
+    if not tracemalloc.is_tracing():
+        _frames.append(None)
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    if _frames and _frames[-1] is not None:
+        _frames[-1][1] = max(_frames[-1][1], peak)
+    tracemalloc.reset_peak()
+    _frames.append([current, current])
+
+
+def _pop():
+    # Close a frame and return its peak in MB above its start, if traced
+    frame = _frames.pop()
+    if frame is None or not tracemalloc.is_tracing():
+        return None
+    peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    if _frames and _frames[-1] is not None:
+        _frames[-1][1] = max(_frames[-1][1], peak)
+    return (peak - frame[0]) / _MB
+
+
+class Timing:
+    """Seconds and peak MB of one pass through a stage, set when it exits."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+        self.peak_mb = None
+
+
+class Run:
+    """Stages and values of one instrumented run; see `run`."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.started = datetime.now(timezone.utc)
+        self.stages = {}
+        self.values = {}
+        self.seconds = None
+        self.peak_mb = None
+        self.status = "running"
+        self.profile = None
+
+    def _add(self, timing):
+        entry = self.stages.setdefault(
+            timing.name, {"calls": 0, "seconds": 0.0, "peak_mb": None}
+        )
+        entry["calls"] += 1
+        entry["seconds"] += timing.seconds
+        if timing.peak_mb is not None:
+            entry["peak_mb"] = max(entry["peak_mb"] or 0.0, timing.peak_mb)
+
+    def record(self, **values):
+        """Store result values (accuracy, rows, ...) alongside the timings."""
+        self.values.update(values)
+
+    def to_dict(self):
+        return {
+            "run": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "status": self.status,
+            "seconds": self.seconds,
+            "peak_mb": self.peak_mb,
+            "stages": [{"name": k, **v} for k, v in self.stages.items()],
+            "values": self.values,
+            "profile": self.profile,
+            "versions": _versions(),
+        }
+
+
+@contextmanager
+def stage(name):
+    """
+    Time the enclosed block and capture its peak memory.
+
+    Yields a `Timing`, filled in on exit. Inside a `run` the result is
+    added to the run's metrics; it is always logged.
+    """
+    timing = Timing(name)
+    _push()
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        timing.peak_mb = _pop()
+        if _active is not None:
+            _active._add(timing)
+        peak = "" if timing.peak_mb is None else f", peak {timing.peak_mb:.1f} MB"
+        logging.info(f"Stage {name}: {timing.seconds:.3f}s{peak}")
+
+
+def timed(name=None):
+    """Decorator form of `stage`; the stage name defaults to the function's."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name or fn.__name__):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def run(name, out_dir=METRICS_DIRNAME, profile=False, memory=False):
+    """
+    Record the stages of one pipeline run to `<out_dir>/<name>-<time>.json`.
+
+    Args:
+        name (str): Run name, e.g. "train"; also the file name prefix.
+        out_dir: Folder for the metrics (and profile) files.
+        profile (bool): Also profile the run with cProfile and dump the
+            stats to the same path with a `.prof` suffix.
+        memory (bool): Trace allocations to report peak memory per stage.
+            Off by default, as tracing slows the stages it measures.
+
+    Yields:
+        Run: Call `record(**values)` on it to store results with the run.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError(f"Run {_active.name!r} is already being recorded")
+
+    out_dir = Path(out_dir)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    current = Run(name, out_dir / f"{name}-{stamp}.json")
+    own_tracing = memory and not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if profile else None
+
+    _active = current
+    logging.info(f"Run {name} started")
+    _push()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield current
+        current.status = "ok"
+    except BaseException:
+        current.status = "failed"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        current.seconds = time.perf_counter() - start
+        current.peak_mb = _pop()
+        _active = None
+        if own_tracing:
+            tracemalloc.stop()
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            prof = current.path.with_suffix(".prof")
+            profiler.dump_stats(prof)
+            current.profile = str(prof)
+        current.path.write_text(
+            json.dumps(current.to_dict(), indent=2, default=_plain)
+        )
+        logging.info(
+            f"Run {name} {current.status} in {current.seconds:.2f}s, "
+            f"metrics in {current.path}"
+        )
+
+
+def _plain(value):
+    # NumPy scalars and arrays in recorded values
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def add_arguments(parser, metrics_dir=METRICS_DIRNAME):
+    """Add the shared `--profile`, `--memory` and `--metrics-dir` options to a CLI."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="dump cProfile stats next to the run's metrics file",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace allocations to record peak memory per stage (slows the run)",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=metrics_dir,
+        help=f"where per-run JSON metrics are written (default: {metrics_dir})",
+    )
+
+
+def compare(baseline, current):
+    """Print per-stage seconds and peak MB of two metrics files side by side."""
+    a = json.loads(Path(baseline).read_text())
+    b = json.loads(Path(current).read_text())
+    stages_a = {s["name"]: s for s in a["stages"]}
+    stages_b = {s["name"]: s for s in b["stages"]}
+    names = list(stages_a) + [n for n in stages_b if n not in stages_a]
+    rows = [(n, stages_a.get(n), stages_b.get(n)) for n in names]
+    rows.append(("total", a, b))
+
+    header = ["base s", "new s", "change", "base MB", "new MB"]
+    print(f"{'stage':<14}" + "".join(f"{h:>9}" for h in header))
+    for name, old, new in rows:
+        seconds = [x["seconds"] if x else None for x in (old, new)]
+        peaks = [x["peak_mb"] if x else None for x in (old, new)]
+        change = "-"
+        if None not in seconds and seconds[0]:
+            change = f"{seconds[1] / seconds[0] - 1:+.0%}"
+        cells = [f"{x:.3f}" if x is not None else "-" for x in seconds]
+        cells += [f"{x:.1f}" if x is not None else "-" for x in peaks]
+        cells.insert(2, change)
+        print(f"{name:<14}" + "".join(f"{c:>9}" for c in cells))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser("Compare two instrumented runs")
+    parser.add_argument("baseline", help="metrics JSON of the reference run")
+    parser.add_argument("current", help="metrics JSON of the run to check")
+    args = parser.parse_args()
+    compare(args.baseline, args.current)
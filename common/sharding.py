@@ -0,0 +1,220 @@
+"""
+Data-parallel random forest training.
+
+`train_sharded` splits the training rows into `shards` disjoint parts and
+writes each part to disk as its own `.npy` (or sparse `.npz`) file. A pool
+of worker processes then fits one sub-forest per shard, and each worker
+memory-maps only its own shard. The sub-forests get an equal share of
+`n_estimators` and distinct seeds. `merge_forests` then concatenates their
+trees into one ordinary `RandomForestClassifier` / `RandomForestRegressor`
+that predicts, pickles and compiles (`common.forest`) like any other.
+
+Every tree only sees the rows of its shard, so a merged forest is not the
+same model as one fitted on all rows. `scaling_report` measures what that
+costs: it fits the single-process forest and sharded forests of growing
+shard counts on the same split, then reports the wall time, the speedup and
+the change in each test metric.
+
+Classification shards are stratified, so every sub-forest sees every class.
+Out-of-bag scores are not supported, since each sub-forest's bootstrap
+indices refer to its own shard.
+"""
+
+import copy
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from common.instrument import stage
+
+
+def write_shards(X, y, out_dir, shards, stratify=False, random_state=0):
+    """
+    Split the rows of `X`, `y` into `shards` shuffled parts saved in `out_dir`.
+
+    Returns the shard file paths as `(X_path, y_path)` pairs. With
+    `stratify`, every shard keeps the class balance of `y`.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    y = np.asarray(y)
+    if shards == 1:
+        parts = [np.arange(len(y))]
+    else:
+        splitter = StratifiedKFold if stratify else KFold
+        folds = splitter(shards, shuffle=True, random_state=random_state)
+        # The held-out folds of a k-fold split are k disjoint shards
+        parts = [test for _, test in folds.split(np.zeros(len(y)), y)]
+
+    paths = []
+    for i, rows in enumerate(parts):
+        rows = np.sort(rows)
+        if sp.issparse(X):
+            X_path = out_dir / f"shard-{i}-X.npz"
+            sp.save_npz(X_path, X[rows].tocsr(), compressed=False)
+        else:
+            X_path = out_dir / f"shard-{i}-X.npy"
+            np.save(X_path, X[rows])
+        y_path = out_dir / f"shard-{i}-y.npy"
+        np.save(y_path, y[rows])
+        paths.append((X_path, y_path))
+    return paths
+
+
+def _fit_shard(estimator, X_path, y_path):
+    # Runs in a worker: read this shard only and fit the sub-forest on it
+    if X_path.suffix == ".npz":
+        X = sp.load_npz(X_path)
+    else:
+        X = np.load(X_path, mmap_mode="r")
+    y = np.load(y_path)
+    return estimator.fit(X, y)
+
+
+def merge_forests(forests):
+    """Combine fitted forests of the same type into one forest of all their trees."""
+    merged = copy.deepcopy(forests[0])
+    for forest in forests[1:]:
+        if type(forest) is not type(merged):
+            raise ValueError(
+                f"Cannot merge a {type(forest).__name__} into a "
+                f"{type(merged).__name__}"
+            )
+        if forest.n_features_in_ != merged.n_features_in_:
+            raise ValueError("Forests were fitted on different numbers of features")
+        if is_classifier(merged) and not np.array_equal(
+            forest.classes_, merged.classes_
+        ):
+            raise ValueError(
+                f"Forests saw different classes: {forest.classes_} "
+                f"and {merged.classes_}"
+            )
+        merged.estimators_ += forest.estimators_
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def train_sharded(
+    estimator, X, y, shards, workers=None, shard_dir=None, random_state=0
+):
+    """
+    Fit `estimator` (an unfitted random forest) data-parallel over `shards`.
+
+    Args:
+        estimator: Template forest; its `n_estimators` are divided between
+            the shards.
+        X: Array, DataFrame or sparse matrix of training rows.
+        y: Targets.
+        shards (int): Number of disjoint row partitions and sub-forests.
+        workers (int): Worker processes (default: CPUs, at most `shards`);
+            with 1 the sub-forests are fitted in this process.
+        shard_dir: Where the shards are written; a temporary folder, removed
+            afterwards, when not given.
+        random_state (int): Seed of the row split; sub-forest `i` uses
+            the template's `random_state + i`.
+
+    Returns:
+        The merged forest.
+    """
+    if shards < 1 or shards > estimator.n_estimators:
+        raise ValueError(
+            f"shards must be between 1 and n_estimators ({estimator.n_estimators})"
+        )
+    if getattr(estimator, "oob_score", False):
+        raise ValueError("oob_score is not supported by sharded training")
+
+    feature_names = None
+    if isinstance(X, pd.DataFrame):
+        feature_names = np.asarray(X.columns, dtype=object)
+        X = X.to_numpy()
+
+    seed = estimator.random_state
+    sub_forests = []
+    trees = np.array_split(np.arange(estimator.n_estimators), shards)
+    for i, n_trees in enumerate(map(len, trees)):
+        sub = clone(estimator).set_params(n_estimators=n_trees, n_jobs=1)
+        if isinstance(seed, (int, np.integer)):
+            sub.set_params(random_state=seed + i)
+        sub_forests.append(sub)
+
+    workers = min(workers or os.cpu_count() or 1, shards)
+    with tempfile.TemporaryDirectory(dir=shard_dir) as tmp:
+        with stage("shard"):
+            stratify = is_classifier(estimator)
+            paths = write_shards(X, y, tmp, shards, stratify, random_state)
+        logging.info(
+            f"Fitting {shards} sub-forests of ~{sub_forests[0].n_estimators} trees "
+            f"on {workers} workers"
+        )
+        if workers == 1:
+            fitted = [_fit_shard(sub, *p) for sub, p in zip(sub_forests, paths)]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                fitted = list(pool.map(_fit_shard, sub_forests, *zip(*paths)))
+
+    merged = merge_forests(fitted)
+    merged.set_params(n_jobs=estimator.n_jobs, random_state=seed)
+    if feature_names is not None:
+        merged.feature_names_in_ = feature_names
+    return merged
+
+
+def _default_shard_counts():
+    # Powers of two up to the CPU count, and at least up to 4
+    cpus = os.cpu_count() or 1
+    return [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= max(cpus, 4)]
+
+
+def scaling_report(
+    estimator, X_train, y_train, X_test, y_test, metrics, shard_counts=None
+):
+    """
+    Compare single-process training with sharded training at several shard counts.
+
+    Args:
+        estimator: Unfitted template forest, as for `train_sharded`.
+        metrics (dict): Name -> `fn(model, X_test, y_test)`, higher or lower
+            is better as the metric defines.
+        shard_counts (list): Shard counts to time; each uses as many workers
+            as shards, up to the CPU count.
+
+    Returns:
+        pd.DataFrame: One row per configuration with `workers`, `seconds`,
+        `speedup` over the single-process fit, and every metric with its
+        change from the single-process value (`<metric>_delta`).
+    """
+    cpus = os.cpu_count() or 1
+    rows = []
+
+    start = time.perf_counter()
+    model = clone(estimator).set_params(n_jobs=1).fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+    baseline = {name: fn(model, X_test, y_test) for name, fn in metrics.items()}
+    rows.append({"mode": "single", "shards": 1, "workers": 1, "seconds": seconds})
+    rows[0].update(baseline)
+
+    for shards in shard_counts or _default_shard_counts():
+        workers = min(shards, cpus)
+        start = time.perf_counter()
+        model = train_sharded(estimator, X_train, y_train, shards, workers=workers)
+        seconds = time.perf_counter() - start
+        row = {"mode": "sharded", "shards": shards, "workers": workers}
+        row["seconds"] = seconds
+        row.update({name: fn(model, X_test, y_test) for name, fn in metrics.items()})
+        rows.append(row)
+
+    report = pd.DataFrame(rows)
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    for name, value in baseline.items():
+        report[f"{name}_delta"] = report[name] - value
+    logging.info(f"Sharded training on {cpus} CPUs:\n{report.to_string()}")
+    return report
@@ -0,0 +1,288 @@
+"""
+Synthetic stand-ins for the task datasets, at any size.
+
+Each generator returns a chunk of rows with the columns, dtypes, value
+formats and missing-value rates of the real file:
+
+- `creditcard`: Time, V1..V28, Amount, Class, with 0.173% fraud (at least
+  `MIN_FRAUDS` rows, so small samples can still be undersampled).
+- `imdb`: the raw IMDb India scrape, including "(2019)" years, "109 min"
+  durations, comma-separated genres, "1,086" votes with the occasional
+  "$5.16M" / "1.2M", skewed director and actor frequencies, and accented
+  names. Written as cp1252, like the original.
+- `titanic`: the Kaggle Titanic columns, including quoted "Surname, Title
+  First" names and mostly-missing cabins.
+- `iris`: the four measurements around each species' real means.
+
+Targets depend on the features the models use, so fitted models behave
+roughly as they do on the real data. `write_csv` streams chunks of
+`CHUNK_ROWS` to disk, so 10M rows never need 10M rows in memory:
+
+    python -m common.synthetic imdb 10000000 /tmp/imdb/imdb.csv
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+FRAUD_RATE = 0.00173
+MIN_FRAUDS = 20
+
+FIRST = np.array(
+    "Aarav Aditi Amit Anil Anjali Arjun Bobby Deepa Dev Farhan Gauri Imran "
+    "Ishaan Jaya Kabir Karan Kavya Manoj Meera Naveen Neha Nikhil Pooja Priya "
+    "Rahul Raj Ravi Rekha Rohan Sanjay Sara Shreya Sunil Tara Varun Vikram "
+    "Zoë André Renée Chloé".split()
+)
+LAST = np.array(
+    "Agarwal Bachchan Bakshi Banerjee Bhatt Chopra Das Desai Dutt Ghosh Gupta "
+    "Iyer Joshi Kapoor Khan Khanna Kumar Malhotra Mehta Menon Mishra Nair "
+    "Patel Pillai Rao Reddy Roy Saxena Sen Shah Sharma Singh Sinha Varma "
+    "Verma Yadav Müller Gómez".split()
+)
+WORDS = np.array(
+    "Dil Pyaar Ishq Raat Safar Zindagi Kahani Dost Sapna Raja Rani Ghar Duniya "
+    "Aag Pani Sitara Mohabbat Badla Sangam Yaari Dhadkan Roshni Toofan Khel "
+    "Sheher Chand Suraj Dastaan".split()
+)
+GENRES = np.array(
+    "Drama Comedy Romance Action Thriller Crime Family Musical Horror Mystery "
+    "Adventure Fantasy History Biography Documentary War Sport Animation".split()
+)
+
+
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def _names(rng, n):
+    # `n` distinct "First Last" names, in random order; once the first/last
+    # combinations run out, middle initials ("First B. Last") keep them unique
+    i = rng.permutation(n)
+    first = FIRST[i % len(FIRST)]
+    last = LAST[i // len(FIRST) % len(LAST)]
+    k = i // (len(FIRST) * len(LAST))
+    middle = np.full(n, "", dtype="<U8")
+    while (k > 0).any():
+        more = k > 0
+        middle[more] = np.char.add(LETTERS[(k[more] - 1) % 26], middle[more])
+        k = np.where(more, (k - 1) // 26, 0)
+    middle = np.where(middle == "", " ", np.char.add(np.char.add(" ", middle), ". "))
+    return np.char.add(np.char.add(first, middle), last)
+
+
+def _skewed_pick(rng, pool, n, missing):
+    # A few names appear often and most rarely: like the real directors and
+    # actors, the most frequent one is about 0.5% of the rows
+    ranks = (len(pool) * rng.random(n) ** 1.5).astype(np.int64)
+    out = pool[ranks].astype(object)
+    out[rng.random(n) < missing] = np.nan
+    return out
+
+
+def _with_missing(rng, values, missing):
+    # `missing` is a rate, or one rate per row
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < missing] = np.nan
+    return values
+
+
+def creditcard(rng, n, start=0, fraud=None):
+    """Rows `start .. start+n` of creditcard.csv; `fraud` marks fraud rows."""
+    if fraud is None:
+        fraud = rng.random(n) < FRAUD_RATE
+    V = rng.normal(size=(n, 28)).astype(np.float32)
+    # Frauds sit apart on a handful of components, as in the real PCA space
+    V[fraud, :4] += np.array([-2.5, 1.8, -3.0, 2.2], dtype=np.float32)
+    V[fraud, 9:14] -= 2.0
+    df = pd.DataFrame(V, columns=[f"V{i}" for i in range(1, 29)])
+    # Two days of transactions over 284,807 rows, as in the original
+    df.insert(0, "Time", ((start + np.arange(n)) * 0.6067).astype(np.int64))
+    df["Amount"] = np.round(rng.lognormal(3.0, 1.5, n), 2)
+    df["Class"] = fraud.astype(int)
+    return df
+
+
+def imdb(rng, n, directors, actors):
+    """`n` raw IMDb rows; `directors`/`actors` are the name pools."""
+    year = rng.integers(1931, 2023, n)
+    n_genres = rng.choice([1, 2, 3], n, p=[0.45, 0.3, 0.25])
+    genre_p = np.r_[[0.3, 0.15, 0.1], np.full(len(GENRES) - 3, 0.03)]
+    picks = rng.choice(GENRES, (n, 3), p=genre_p)
+    genre = np.array(
+        [", ".join(dict.fromkeys(g[:k])) for g, k in zip(picks, n_genres)]
+    )
+    votes = np.round(rng.lognormal(4.5, 2.0, n)).astype(np.int64) + 5
+    rating = (
+        5.8
+        + 0.25 * np.log10(votes)
+        - 0.01 * (year - 1990)
+        + np.where(np.char.find(genre, "Drama") >= 0, 0.3, 0.0)
+        - np.where(np.char.find(genre, "Horror") >= 0, 0.8, 0.0)
+        + rng.normal(0, 1.0, n)
+    )
+    rating = np.clip(np.round(rating, 1), 1.0, 10.0)
+
+    # Votes as scraped: thousands separators, and a few "$5.16M"/"1.2M" values
+    votes_txt = np.array([f"{v:,}" for v in votes], dtype=object)
+    odd = rng.random(n) < 0.002
+    millions = np.round(votes[odd] / 1e6 + rng.uniform(0.1, 9.9, odd.sum()), 2)
+    dollar = rng.random(odd.sum()) < 0.5
+    votes_txt[odd] = [f"${m}M" if d else f"{m}M" for m, d in zip(millions, dollar)]
+
+    # Unrated films have neither a rating nor votes
+    unrated = rng.random(n) < 0.49
+    title = np.char.add(rng.choice(WORDS, n), " ")
+    title = np.char.add(title, rng.choice(WORDS, n))
+    title = np.where(rng.random(n) < 0.01, np.char.add("#", title), title)
+    year_txt = np.char.add(np.char.add("(", year.astype(str)), ")")
+    minutes = np.char.add(rng.integers(45, 200, n).astype(str), " min")
+    return pd.DataFrame(
+        {
+            "Name": title,
+            "Year": _with_missing(rng, year_txt, 0.034),
+            "Duration": _with_missing(rng, minutes, 0.53),
+            "Genre": _with_missing(rng, genre, 0.12),
+            "Rating": np.where(unrated, np.nan, rating),
+            "Votes": np.where(unrated, np.nan, votes_txt),
+            "Director": _skewed_pick(rng, directors, n, 0.034),
+            "Actor 1": _skewed_pick(rng, actors, n, 0.10),
+            "Actor 2": _skewed_pick(rng, actors, n, 0.15),
+            "Actor 3": _skewed_pick(rng, actors, n, 0.20),
+        }
+    )
+
+
+def titanic(rng, n, start=0):
+    """Passengers `start+1 .. start+n` of Titanic-Dataset.csv."""
+    pclass = rng.choice([1, 2, 3], n, p=[0.24, 0.21, 0.55])
+    female = rng.random(n) < 0.35
+    age = np.round(np.clip(rng.normal(30, 14, n), 0.42, 80))
+    child = age < 13
+    logit = -1.1 + 2.5 * female - 0.9 * (pclass - 2) + child
+    survival = 1 / (1 + np.exp(-logit))
+    title = np.where(female, np.where(rng.random(n) < 0.6, "Mrs.", "Miss."), "Mr.")
+    title = np.where(child & ~female, "Master.", title)
+    name = np.char.add(np.char.add(rng.choice(LAST, n), ", "), title)
+    name = np.char.add(np.char.add(name, " "), rng.choice(FIRST, n))
+    fare = np.round(rng.lognormal(np.choose(pclass - 1, [4.2, 3.0, 2.2]), 0.6), 4)
+    cabin = np.char.add(
+        rng.choice(list("ABCDEFG"), n), rng.integers(1, 130, n).astype(str)
+    )
+    ticket = np.char.add(
+        rng.choice(["", "PC ", "A/5 ", "STON/O2. "], n),
+        rng.integers(1000, 400000, n).astype(str),
+    )
+    embarked = rng.choice(["S", "C", "Q"], n, p=[0.72, 0.19, 0.09])
+    sibsp_p = [0.68, 0.23, 0.03, 0.02, 0.02, 0.01, 0.01]
+    parch_p = [0.76, 0.13, 0.09, 0.005, 0.005, 0.005, 0.005]
+    return pd.DataFrame(
+        {
+            "PassengerId": start + 1 + np.arange(n),
+            "Survived": (rng.random(n) < survival).astype(int),
+            "Pclass": pclass,
+            "Name": name,
+            "Sex": np.where(female, "female", "male"),
+            "Age": np.where(rng.random(n) < 0.2, np.nan, age),
+            "SibSp": rng.choice([0, 1, 2, 3, 4, 5, 8], n, p=sibsp_p),
+            "Parch": rng.choice([0, 1, 2, 3, 4, 5, 6], n, p=parch_p),
+            "Ticket": ticket,
+            "Fare": fare,
+            "Cabin": _with_missing(rng, cabin, np.where(pclass == 1, 0.1, 0.95)),
+            "Embarked": _with_missing(rng, embarked, 0.002),
+        }
+    )
+
+
+# Per-species means and standard deviations of the four measurements
+IRIS_STATS = {
+    "Iris-setosa": ([5.01, 3.43, 1.46, 0.25], [0.35, 0.38, 0.17, 0.11]),
+    "Iris-versicolor": ([5.94, 2.77, 4.26, 1.33], [0.52, 0.31, 0.47, 0.20]),
+    "Iris-virginica": ([6.59, 2.97, 5.55, 2.03], [0.64, 0.32, 0.55, 0.27]),
+}
+
+
+def iris(rng, n):
+    species = rng.choice(list(IRIS_STATS), n)
+    means = np.array([IRIS_STATS[s][0] for s in IRIS_STATS])
+    stds = np.array([IRIS_STATS[s][1] for s in IRIS_STATS])
+    k = np.searchsorted(list(IRIS_STATS), species)
+    X = np.clip(np.round(rng.normal(means[k], stds[k]), 1), 0.1, None)
+    df = pd.DataFrame(
+        X, columns=["sepal_length", "sepal_width", "petal_length", "petal_width"]
+    )
+    df["species"] = species
+    return df
+
+
+DATASETS = ["creditcard", "imdb", "titanic", "iris"]
+
+
+def write_csv(kind, path, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """
+    Write `n_rows` synthetic rows of dataset `kind` to the CSV at `path`.
+
+    Chunk `i` is drawn from its own generator seeded with `(seed, i)`, so the
+    output depends only on `seed`, `n_rows` and `chunk_rows`.
+
+    Returns:
+        Path: The written file.
+    """
+    if kind not in DATASETS:
+        raise ValueError(f"Unknown dataset {kind!r}, expected one of {DATASETS}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    extra = {}
+    if kind == "imdb":
+        # Cardinality grows with the data, like a bigger scrape
+        extra["directors"] = _names(rng, max(100, n_rows // 3))
+        extra["actors"] = _names(rng, max(200, n_rows // 2))
+    elif kind == "creditcard":
+        n_fraud = min(n_rows, max(MIN_FRAUDS, round(n_rows * FRAUD_RATE)))
+        fraud_rows = np.sort(rng.choice(n_rows, n_fraud, replace=False))
+
+    encoding = "cp1252" if kind == "imdb" else "utf-8"
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        n = min(chunk_rows, n_rows - start)
+        chunk_rng = np.random.default_rng([seed, i])
+        if kind == "creditcard":
+            fraud = np.zeros(n, dtype=bool)
+            lo, hi = np.searchsorted(fraud_rows, [start, start + n])
+            fraud[fraud_rows[lo:hi] - start] = True
+            df = creditcard(chunk_rng, n, start, fraud)
+        elif kind == "imdb":
+            df = imdb(chunk_rng, n, **extra)
+        elif kind == "titanic":
+            df = titanic(chunk_rng, n, start)
+        else:
+            df = iris(chunk_rng, n)
+        df.to_csv(
+            path,
+            mode="w" if i == 0 else "a",
+            header=i == 0,
+            index=False,
+            encoding=encoding,
+        )
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Write a synthetic task dataset")
+    parser.add_argument("dataset", choices=DATASETS)
+    parser.add_argument("rows", type=int, help="number of rows")
+    parser.add_argument("output", type=Path, help="CSV to write")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_csv(args.dataset, args.output, args.rows, args.seed)
+    size_mb = args.output.stat().st_size / 2**20
+    print(
+        f"Wrote {args.rows:,} {args.dataset} rows ({size_mb:.1f} MB) to "
+        f"{args.output} in {time.perf_counter() - start:.1f}s"
+    )
@@ -0,0 +1,44 @@
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+
+# Shared by train.py, test.py and predict.py so all three see identical features
+NUMERIC = ["Pclass", "Age", "SibSp", "Parch", "Fare"]
+CATEGORICAL = ["Sex", "Embarked"]
+FEATURES = NUMERIC + CATEGORICAL
+TARGET = "Survived"
+
+MODEL_PATH = "titanic_model.pkl"
+
+
+def build_pipeline():
+    # Medians, modes and category codes are learned in fit() and reused as-is
+    # at prediction time. Unseen categories are encoded as -1.
+    preprocess = ColumnTransformer(
+        [
+            ("num", SimpleImputer(strategy="median"), NUMERIC),
+            (
+                "cat",
+                Pipeline(
+                    [
+                        ("impute", SimpleImputer(strategy="most_frequent")),
+                        (
+                            "encode",
+                            OrdinalEncoder(
+                                handle_unknown="use_encoded_value", unknown_value=-1
+                            ),
+                        ),
+                    ]
+                ),
+                CATEGORICAL,
+            ),
+        ]
+    )
+    return Pipeline(
+        [
+            ("preprocess", preprocess),
+            ("model", RandomForestClassifier(n_estimators=100, random_state=42)),
+        ]
+    )
@@ -0,0 +1,61 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import FEATURES, MODEL_PATH
+
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.artifacts import load_artifact  # noqa: E402
+from common.forest import compile_forest  # noqa: E402
+from common import instrument  # noqa: E402
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+parser = argparse.ArgumentParser("Score passengers with the trained pipeline")
+parser.add_argument("--input", required=True, help="passenger CSV")
+parser.add_argument("--output", required=True, help="where to write predictions")
+parser.add_argument(
+    "--chunksize", type=int, default=100_000, help="rows scored at a time"
+)
+parser.add_argument(
+    "--compiled",
+    action="store_true",
+    help="score with the flattened forest (same predictions, faster on small chunks)",
+)
+instrument.add_arguments(parser)
+args = parser.parse_args()
+
+with instrument.run(
+    "predict", out_dir=args.metrics_dir, profile=args.profile, memory=args.memory
+) as run:
+    logging.info("Loading model...")
+    with instrument.stage("load"):
+        model = load_artifact(MODEL_PATH)
+        if args.compiled:
+            model = compile_forest(model)
+
+    # Stream the file so memory is bounded by the chunk size, not the file size
+    logging.info(f"Scoring {args.input} in chunks of {args.chunksize} rows...")
+    n_rows = 0
+    with instrument.stage("predict"):
+        for i, chunk in enumerate(pd.read_csv(args.input, chunksize=args.chunksize)):
+            out = (
+                chunk[["PassengerId"]].copy()
+                if "PassengerId" in chunk
+                else pd.DataFrame()
+            )
+            out["Survived"] = model.predict(chunk[FEATURES])
+            out.to_csv(
+                args.output, mode="w" if i == 0 else "a", header=i == 0, index=False
+            )
+            n_rows += len(chunk)
+    run.record(rows=n_rows)
+
+logging.info(f"Wrote {n_rows} predictions to {args.output}")
@@ -1,11 +1,20 @@
-import pandas as pd
-import joblib
+import argparse
 import logging
+import sys
+from pathlib import Path
 import seaborn as sns
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
+from pipeline import FEATURES, MODEL_PATH, TARGET
+
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.artifacts import load_artifact  # noqa: E402
+from common.datasets import load_csv  # noqa: E402
+from common import instrument  # noqa: E402
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -13,28 +22,32 @@ logging.basicConfig(
 
 DATASET = "Titanic-Dataset.csv"
 
-logging.info("Loading model and data...")
-model = joblib.load("titanic_model.pkl")
-df = pd.read_csv(DATASET)
-
-logging.info("Preprocessing test data...")
-df.drop(["PassengerId", "Name", "Ticket", "Cabin"], axis=1, inplace=True)
-df.fillna({"Age": df["Age"].median()}, inplace=True)
-df.fillna({"Embarked": df["Embarked"].mode()[0]}, inplace=True)
-
-df["Sex"] = df["Sex"].map({"male": 1, "female": 0})
-df["Embarked"] = df["Embarked"].map({"C": 0, "Q": 1, "S": 2})
-
-X = df.drop("Survived", axis=1)
-y = df["Survived"]
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-logging.info("Making predictions...")
-y_pred = model.predict(X_test)
-
-accuracy = accuracy_score(y_test, y_pred)
+parser = argparse.ArgumentParser("Evaluate the trained Titanic pipeline")
+instrument.add_arguments(parser)
+args = parser.parse_args()
+
+with instrument.run(
+    "test", out_dir=args.metrics_dir, profile=args.profile, memory=args.memory
+) as run:
+    logging.info("Loading model and data...")
+    with instrument.stage("load"):
+        model = load_artifact(MODEL_PATH)
+        df = load_csv(DATASET, columns=FEATURES + [TARGET])
+
+    # Preprocessing is part of the saved pipeline, with the values learned in
+    # training
+    X = df[FEATURES]
+    y = df[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    logging.info("Making predictions...")
+    with instrument.stage("predict"):
+        y_pred = model.predict(X_test)
+
+    accuracy = accuracy_score(y_test, y_pred)
+    run.record(accuracy=accuracy)
 logging.info(f"Accuracy: {accuracy:.4f}")
 print("Accuracy:", accuracy)
 print("\nClassification Report:\n", classification_report(y_test, y_pred))
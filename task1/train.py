@@ -1,9 +1,16 @@
-import pandas as pd
-import joblib
+import argparse
 import logging
+import sys
+from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
+
+from pipeline import FEATURES, MODEL_PATH, TARGET, build_pipeline
+
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.artifacts import save_artifact  # noqa: E402
+from common.datasets import load_csv  # noqa: E402
+from common import instrument  # noqa: E402
 
 # Configure logging
 logging.basicConfig(
@@ -12,34 +19,38 @@ logging.basicConfig(
 
 DATASET = "Titanic-Dataset.csv"
 
-
-logging.info(f"Loading dataset {DATASET}...")
-df = pd.read_csv(DATASET)
-
-logging.info("Preprocessing data...")
-df.drop(["PassengerId", "Name", "Ticket", "Cabin"], axis=1, inplace=True)
-
-df.fillna({"Age": df["Age"].median()}, inplace=True)
-df.fillna({"Embarked": df["Embarked"].mode()[0]}, inplace=True)
-
-
-le = LabelEncoder()
-df["Sex"] = le.fit_transform(df["Sex"])
-df["Embarked"] = le.fit_transform(df["Embarked"])
-
-logging.info("Splitting dataset into train and test sets...")
-X = df.drop("Survived", axis=1)
-y = df["Survived"]
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-logging.info("Training Random Forest model...")
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-logging.info("Saving trained model and label encoder...")
-joblib.dump(model, "titanic_model.pkl")
-joblib.dump(le, "label_encoder.pkl")
+parser = argparse.ArgumentParser("Train the Titanic survival pipeline")
+instrument.add_arguments(parser)
+args = parser.parse_args()
+
+# Stage timings and peak memory go to metrics/train-<time>.json
+with instrument.run(
+    "train", out_dir=args.metrics_dir, profile=args.profile, memory=args.memory
+):
+    logging.info(f"Loading dataset {DATASET}...")
+    with instrument.stage("load"):
+        df = load_csv(DATASET, columns=FEATURES + [TARGET])
+
+    logging.info("Splitting dataset into train and test sets...")
+    with instrument.stage("preprocess"):
+        X = df[FEATURES]
+        y = df[TARGET]
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+
+    # Imputation and encoding are fitted on the training split only, as part of
+    # the same pipeline as the model
+    logging.info("Training preprocessing + Random Forest pipeline...")
+    with instrument.stage("fit"):
+        model = build_pipeline()
+        model.fit(X_train, y_train)
+
+    logging.info("Saving trained pipeline...")
+    with instrument.stage("save"):
+        meta = save_artifact(model, MODEL_PATH, metadata={"target": TARGET})
+    logging.info(
+        f"Saved {meta['size_bytes'] / 1024:.0f} KB, sha256 {meta['sha256'][:12]}"
+    )
 
 logging.info("Model training complete and saved.")
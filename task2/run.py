@@ -0,0 +1,359 @@
+"""
+Cross-platform pipeline runner (replaces `run.ps1`).
+
+Runs load → preprocess → features → train → evaluate in one process. Each
+stage is fingerprinted from its inputs, its source files and its parameters;
+the output is stored under the cache directory with the fingerprint in its
+name, so a stage whose fingerprint already has an output is skipped.
+Intermediate frames are stored as Feather instead of CSV, and features can
+be kept as a sparse `.npz` matrix with `--sparse`.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The stage modules import each other by bare name, as when run from src/
+SRC_DIR = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+# The shared artifact helpers live in common/ at the repository root
+COMMON_DIR = Path(__file__).resolve().parents[1] / "common"
+sys.path.append(str(COMMON_DIR.parent))
+
+from data_loader import load_raw_data  # noqa: E402
+from preprocess import preprocess_raw  # noqa: E402
+from features import (  # noqa: E402
+    PIPELINE_FILENAME,
+    build_features,
+    build_features_hashed,
+    build_features_sparse,
+    check_pipeline,
+    load_features,
+    make_feature_pipeline,
+    save_sparse,
+)
+from train import train_and_validate  # noqa: E402
+from evaluate import evaluate_model, print_metrics  # noqa: E402
+from common.artifacts import META_SUFFIX, load_artifact, save_artifact  # noqa: E402
+from common import instrument  # noqa: E402
+
+STAGES = ["load", "preprocess", "features", "train", "evaluate"]
+
+# Parameters that change a stage's output; part of its fingerprint
+PARAMS = {
+    "load": {"encoding": None},  # None: detected per file
+    "preprocess": {"thresh": 0.5},
+    "features": {"top_n": 30, "sparse": False, "hash_features": None},
+    "train": {"test_size": 0.2, "random_state": 42, "search": "grid", "shards": 1},
+    "evaluate": {},
+}
+
+# Source files each stage runs: its module and every local module that module
+# imports, directly or not; editing any of them invalidates the stage
+CODE = {
+    "load": [SRC_DIR / "data_loader.py"],
+    "preprocess": [SRC_DIR / "preprocess.py"],
+    "features": [SRC_DIR / "features.py", SRC_DIR / "preprocess.py"],
+    "train": [
+        SRC_DIR / "train.py",
+        SRC_DIR / "data_loader.py",
+        SRC_DIR / "features.py",
+        SRC_DIR / "preprocess.py",
+        COMMON_DIR / "artifacts.py",
+        COMMON_DIR / "instrument.py",
+        COMMON_DIR / "sharding.py",
+    ],
+    "evaluate": [
+        SRC_DIR / "evaluate.py",
+        SRC_DIR / "data_loader.py",
+        SRC_DIR / "features.py",
+        SRC_DIR / "preprocess.py",
+        COMMON_DIR / "artifacts.py",
+    ],
+}
+
+SUFFIX = {
+    "load": ".feather",
+    "preprocess": ".feather",
+    "features": ".feather",
+    "train": ".pkl",
+    "evaluate": ".json",
+}
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(stage: str, upstream: str) -> str:
+    # Upstream is the previous stage's fingerprint (or the raw files' hashes),
+    # so a change anywhere earlier in the chain propagates downstream.
+    h = hashlib.sha256()
+    h.update(stage.encode())
+    h.update(upstream.encode())
+    # run.py itself decides how the stages are chained and read each other
+    for path in [Path(__file__), *CODE[stage]]:
+        h.update(hash_file(path).encode())
+    h.update(json.dumps(PARAMS[stage], sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    df.reset_index(drop=True).to_feather(path)
+
+
+def read_frame(path: Path) -> pd.DataFrame:
+    # Arrow hands back missing strings as None; the stages expect NaN like read_csv
+    return pd.read_feather(path).fillna(np.nan)
+
+
+def read_features(path: Path):
+    if path.suffix == ".npz":
+        return load_features(path)
+    df = read_frame(path)
+    return df.drop(columns=["Rating"]), df["Rating"]
+
+
+def pipeline_path(out: Path) -> Path:
+    # The train stage saves the fitted feature pipeline next to its model
+    return out.with_name(f"{out.stem}-{PIPELINE_FILENAME}")
+
+
+def stage_files(stage: str, out: Path) -> list:
+    # Every file a stage writes for output `out`, with `out` itself last
+    if stage != "train":
+        return [out]
+    pipeline = pipeline_path(out)
+    return [
+        Path(f"{pipeline}{META_SUFFIX}"),
+        pipeline,
+        Path(f"{out}{META_SUFFIX}"),
+        out,
+    ]
+
+
+def partial(out: Path) -> Path:
+    # Where a stage writes before its output is complete; the suffix is kept
+    # since np.savez and joblib go by it
+    return out.with_name(f"{out.stem}.tmp{out.suffix}")
+
+
+def suffix(stage: str) -> str:
+    if stage == "features" and (
+        PARAMS["features"]["sparse"] or PARAMS["features"]["hash_features"]
+    ):
+        return ".npz"
+    return SUFFIX[stage]
+
+
+def run_stage(stage: str, inputs: dict, out: Path, workers=None) -> None:
+    # Each step is timed as an instrument stage: reading the upstream cache
+    # file counts as "load", writing this stage's output as "save"
+    if stage == "load":
+        # The combined raw frame is held in memory, as preprocess needs all of
+        # it; for catalogues larger than memory use src/streaming.py instead
+        with instrument.stage("load"):
+            df = load_raw_data(inputs["raw_dir"], workers=workers, **PARAMS["load"])
+        with instrument.stage("save"):
+            write_frame(df, out)
+    elif stage == "preprocess":
+        with instrument.stage("load"):
+            df = read_frame(inputs["load"])
+        with instrument.stage("preprocess"):
+            df = preprocess_raw(df, **PARAMS["preprocess"])
+        with instrument.stage("save"):
+            write_frame(df, out)
+    elif stage == "features":
+        with instrument.stage("load"):
+            df = read_frame(inputs["preprocess"])
+        top_n = PARAMS["features"]["top_n"]
+        hash_features = PARAMS["features"]["hash_features"]
+        if hash_features:
+            with instrument.stage("features"):
+                features = build_features_hashed(df, hash_features)
+            with instrument.stage("save"):
+                save_sparse(out, *features)
+        elif PARAMS["features"]["sparse"]:
+            with instrument.stage("features"):
+                features = build_features_sparse(df, top_n=top_n)
+            with instrument.stage("save"):
+                save_sparse(out, *features)
+        else:
+            with instrument.stage("features"):
+                features = build_features(df, top_n=top_n)
+            with instrument.stage("save"):
+                write_frame(features, out)
+    elif stage == "train":
+        with instrument.stage("load"):
+            X, y = read_features(inputs["features"])
+            raw = read_frame(inputs["load"]).drop(columns=["Rating"], errors="ignore")
+        with instrument.stage("fit"):
+            model, metrics = train_and_validate(
+                X, y, workers=workers, **PARAMS["train"]
+            )
+            # preprocess + features as one fitted transform for predict.py;
+            # fitted on the same rows, it reproduces the training columns
+            pipeline = make_feature_pipeline(
+                top_n=PARAMS["features"]["top_n"],
+                thresh=PARAMS["preprocess"]["thresh"],
+                hash_features=PARAMS["features"]["hash_features"],
+            ).fit(raw)
+            check_pipeline(pipeline, model)
+        print_metrics(metrics, prefix="Validation")
+        with instrument.stage("save"):
+            save_artifact(model, out, metadata={"validation": metrics})
+            save_artifact(pipeline, pipeline_path(out))
+    elif stage == "evaluate":
+        with instrument.stage("load"):
+            model = load_artifact(inputs["train"])
+            X, y = read_features(inputs["features"])
+        with instrument.stage("predict"):
+            metrics = evaluate_model(model, X, y)
+        out.write_text(json.dumps(metrics, indent=2))
+
+
+def run_pipeline(
+    raw_dir: Path, cache_dir: Path, model_out: Path, force=(), workers=None
+):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Forcing a stage also reruns every stage after it
+    first_forced = min((STAGES.index(s) for s in force), default=len(STAGES))
+
+    upstream = "".join(hash_file(f) for f in sorted(raw_dir.glob("*.csv")))
+    inputs = {"raw_dir": raw_dir}
+    timings = []
+
+    for i, stage in enumerate(STAGES):
+        fp = fingerprint(stage, upstream)
+        out = cache_dir / f"{stage}-{fp}{suffix(stage)}"
+
+        start = time.perf_counter()
+        if all(f.exists() for f in stage_files(stage, out)) and i < first_forced:
+            status = "cached"
+        else:
+            print(f"\n▶ Running {stage} → {out}")
+            # Only a complete output is moved into place, so a stage that fails
+            # mid-write is rerun rather than served from a truncated file
+            run_stage(stage, inputs, partial(out), workers)
+            for tmp, final in zip(
+                stage_files(stage, partial(out)), stage_files(stage, out)
+            ):
+                os.replace(tmp, final)
+            status = "ran"
+        timings.append((stage, status, time.perf_counter() - start))
+
+        inputs[stage] = out
+        upstream = fp
+
+    model_out.parent.mkdir(parents=True, exist_ok=True)
+    # predict.py reads the feature pipeline from the model's folder
+    artifacts = [
+        (inputs["train"], model_out),
+        (pipeline_path(inputs["train"]), model_out.with_name(PIPELINE_FILENAME)),
+    ]
+    for src, dst in artifacts:
+        shutil.copyfile(src, dst)
+        shutil.copyfile(f"{src}{META_SUFFIX}", f"{dst}{META_SUFFIX}")
+
+    print("\nStage        Status   Seconds")
+    for stage, status, secs in timings:
+        print(f"{stage:<12} {status:<8} {secs:7.2f}")
+
+    metrics = json.loads(inputs["evaluate"].read_text())
+    print()
+    print_metrics(metrics)
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Run the movie rating pipeline")
+    parser.add_argument(
+        "--raw-dir", type=Path, default=Path("data/raw"), help="raw CSV folder"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path("data/cache"),
+        help="where stage outputs are cached",
+    )
+    parser.add_argument(
+        "--model-out",
+        type=Path,
+        default=Path("models/best_model.pkl"),
+        help="where to save the trained model",
+    )
+    parser.add_argument(
+        "--force",
+        choices=STAGES,
+        action="append",
+        default=[],
+        help="rerun this stage and all later ones even if cached (repeatable)",
+    )
+    parser.add_argument(
+        "--sparse",
+        action="store_true",
+        help="keep features as a sparse CSR matrix (.npz) instead of a frame",
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=PARAMS["features"]["top_n"],
+        help="number of most frequent directors/actors to one-hot encode",
+    )
+    parser.add_argument(
+        "--hash-features",
+        type=int,
+        default=None,
+        help="hash director, actors and genres into this many sparse columns instead",
+    )
+    parser.add_argument(
+        "--search",
+        choices=["grid", "halving", "random"],
+        default=PARAMS["train"]["search"],
+        help="hyperparameter search strategy used by the train stage",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=PARAMS["train"]["shards"],
+        help="fit sub-forests on this many data shards instead of searching",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parallel raw CSV readers, and sharded fits (default: CPUs)",
+    )
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    PARAMS["features"].update(
+        top_n=args.top_n, sparse=args.sparse, hash_features=args.hash_features
+    )
+    PARAMS["train"].update(search=args.search, shards=args.shards)
+
+    # Stage timings (and peak memory with --memory) go to
+    # <metrics-dir>/pipeline-<time>.json; stages served from the cache are not timed
+    with instrument.run(
+        "pipeline", out_dir=args.metrics_dir, profile=args.profile, memory=args.memory
+    ) as run:
+        metrics = run_pipeline(
+            args.raw_dir,
+            args.cache_dir,
+            args.model_out,
+            force=args.force,
+            workers=args.workers,
+        )
+        run.record(params=PARAMS, **metrics)
@@ -0,0 +1,83 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocess import clean_votes, clean_votes_helper, parse_duration, parse_year
+
+
+# Row-wise implementations the vectorized versions replaced, kept as reference
+def legacy_parse_year(df: pd.DataFrame, col: str = "Year") -> pd.DataFrame:
+    df[col] = df[col].str.extract(r"(\d{4})").astype(float)
+    return df
+
+
+def legacy_parse_duration(df: pd.DataFrame, col: str = "Duration") -> pd.DataFrame:
+    df[col] = df[col].str.extract(r"(\d+)").astype(float)
+    return df
+
+
+def legacy_clean_votes(df: pd.DataFrame, col: str = "Votes") -> pd.DataFrame:
+    if col == "Votes":
+        df[col] = df[col].apply(clean_votes_helper)
+
+    df[col] = (
+        df[col]
+        .astype(str)
+        .str.replace(r"[+,]", "", regex=True)
+        .replace("nan", np.nan)
+        .astype(float)
+    )
+    return df
+
+
+CASES = [
+    ("Year", legacy_parse_year, parse_year),
+    ("Duration", legacy_parse_duration, parse_duration),
+    ("Votes", legacy_clean_votes, clean_votes),
+]
+
+
+def make_frame(raw: Path, rows: int) -> pd.DataFrame:
+    # Repeat the real data up to `rows` and sprinkle in the "$" / "M" quirks
+    df = pd.read_csv(raw, encoding="cp1252", usecols=[c for c, _, _ in CASES])
+    df = pd.concat([df] * (rows // len(df) + 1), ignore_index=True).iloc[:rows]
+    df.loc[::97, "Votes"] = "$1.2M"
+    df.loc[::89, "Votes"] = "$3,400"
+    return df
+
+
+def timed(fn, df: pd.DataFrame, col: str):
+    part = df[[col]].copy()
+    start = time.perf_counter()
+    out = fn(part, col)[col]
+    return out, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Benchmark Year/Duration/Votes cleaning")
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=Path("data/raw/IMDb Movies India.csv"),
+        help="raw CSV to replicate",
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="sizes"
+    )
+    args = parser.parse_args()
+
+    print(f"{'column':<10}{'rows':>10}{'legacy rows/s':>16}{'vector rows/s':>16}")
+    for rows in args.rows:
+        df = make_frame(args.input, rows)
+        for col, legacy, vectorized in CASES:
+            expected, t_old = timed(legacy, df, col)
+            got, t_new = timed(vectorized, df, col)
+
+            # Both paths must produce exactly the same floats, NaN included
+            np.testing.assert_array_equal(
+                expected.to_numpy(dtype=float), got.to_numpy(dtype=float)
+            )
+            print(f"{col:<10}{rows:>10}{rows / t_old:>16,.0f}{rows / t_new:>16,.0f}")
@@ -0,0 +1,113 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score, root_mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from data_loader import detect_encoding
+from features import make_feature_pipeline
+
+# The synthetic IMDb generator lives in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common import synthetic  # noqa: E402
+
+
+def load_rows(raw: Path, rows: int = None) -> pd.DataFrame:
+    # The real file, or `rows` synthetic rows in its format; labelled rows only
+    if rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = synthetic.write_csv("imdb", Path(tmp) / "imdb.csv", rows)
+            df = pd.read_csv(raw, encoding="cp1252")
+    else:
+        df = pd.read_csv(raw, encoding=detect_encoding(raw))
+    return df.dropna(subset=["Rating"]).reset_index(drop=True)
+
+
+def run_encoding(name, pipeline, X_train, X_test, y_train, y_test, chunksize):
+    start = time.perf_counter()
+    F_train = pipeline.fit_transform(X_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    F_test = pipeline.transform(X_test)
+    transform_s = time.perf_counter() - start
+
+    if "hash" in name:
+        # Stateless: chunks encoded separately give exactly the same matrix
+        parts = [
+            pipeline.transform(X_test.iloc[i : i + chunksize])
+            for i in range(0, len(X_test), chunksize)
+        ]
+        assert (sp.vstack(parts).tocsr() != sp.csr_matrix(F_test)).nnz == 0
+
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+    start = time.perf_counter()
+    model.fit(F_train, y_train)
+    model_s = time.perf_counter() - start
+    preds = model.predict(F_test)
+
+    return {
+        "encoding": name,
+        "columns": F_train.shape[1],
+        "fit s": fit_s,
+        "transform s": transform_s,
+        "model s": model_s,
+        "val RMSE": root_mean_squared_error(y_test, preds),
+        "val R2": r2_score(y_test, preds),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Benchmark top-N one-hot vs hashed features")
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=Path("data/raw/IMDb Movies India.csv"),
+        help="raw CSV with ratings",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=None,
+        help="use this many synthetic rows (common/synthetic.py) instead of --input",
+    )
+    parser.add_argument("--top-n", type=int, default=30, help="top-N baseline")
+    parser.add_argument(
+        "--hash-features",
+        type=int,
+        nargs="+",
+        default=[2**10, 2**12, 2**14],
+        help="hash widths to compare",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=1000, help="chunk size of the hashing check"
+    )
+    args = parser.parse_args()
+
+    df = load_rows(args.input, args.rows)
+    X, y = df.drop(columns=["Rating"]), df["Rating"].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+    print(f"{len(X_train)} training rows, {len(X_test)} validation rows")
+
+    encodings = [(f"top-{args.top_n}", make_feature_pipeline(top_n=args.top_n))]
+    encodings += [
+        (f"hash-{n}", make_feature_pipeline(hash_features=n))
+        for n in args.hash_features
+    ]
+    results = [
+        run_encoding(name, pipe, X_train, X_test, y_train, y_test, args.chunksize)
+        for name, pipe in encodings
+    ]
+    print(pd.DataFrame(results).round(4).to_string(index=False))
+    # How often inference meets new names, which top-N can only call "Other"
+    unseen = ~X_test["Director"].isin(set(X_train["Director"]))
+    print(f"Validation rows with a director unseen in training: {np.mean(unseen):.1%}")
@@ -1,14 +1,145 @@
+import codecs
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import argparse
 
+# Tried in order; latin-1 maps every byte, so detection always succeeds
+ENCODINGS = ["utf-8", "cp1252", "latin-1"]
 
-def load_raw_data(data_dir: Path) -> pd.DataFrame:
+POOLS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+
+def detect_encoding(path: Path, candidates=ENCODINGS) -> str:
+    """
+    Return the first encoding in `candidates` that decodes the whole file.
+
+    The file is decoded incrementally in 1 MiB blocks, so a character split
+    across two blocks is not mistaken for an error. A UTF-8 byte order mark
+    gives "utf-8-sig", so the BOM does not end up in the first column name.
+    """
+    with open(path, "rb") as f:
+        if f.read(3) == codecs.BOM_UTF8:
+            return "utf-8-sig"
+
+    for encoding in candidates:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    decoder.decode(block)
+            decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"None of {candidates} can decode {path}")
+
+
+def probe_file(path: Path, encoding: str = None):
+    # Encoding and stripped column names, without reading the rows
+    encoding = encoding or detect_encoding(path)
+    header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+    return encoding, [str(c).strip() for c in header]
+
+
+def align_schema(headers) -> list:
+    """Union of all files' columns, in the order they are first seen."""
+    columns = []
+    for header in headers:
+        columns += [c for c in header if c not in columns]
+    return columns
+
+
+def read_file(path: Path, encoding: str, columns: list) -> pd.DataFrame:
+    # Runs in a worker: parse one file and conform it to the shared schema.
+    # Raw dumps are read once per run, so they skip the Arrow dataset cache
+    # (run.py caches the combined frame itself)
+    df = pd.read_csv(path, encoding=encoding)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df.reindex(columns=columns)
+
+
+def pool_map(pool, fn, *iterables, workers: int):
+    """
+    Map `fn` over `iterables` on an executor `pool`, yielding in input order.
+
+    At most 2 x `workers` results are in flight, so a slow consumer never lets
+    finished results pile up in memory. Inputs are drawn lazily, so they may be
+    a generator of chunks.
+    """
+    pending = []
+    for a in zip(*iterables):
+        pending.append(pool.submit(fn, *a))
+        if len(pending) >= 2 * workers:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def iter_raw_frames(
+    data_dir: Path, encoding: str = None, workers: int = None, pool: str = "process"
+):
+    """
+    Read every CSV in `data_dir` in parallel and yield one frame per file.
+
+    Files are probed first: each gets its encoding (detected unless
+    `encoding` is given) and header. Every frame is then reindexed to the
+    union of all headers, so files with missing, extra or reordered columns
+    line up; absent columns are NaN.
+
+    Args:
+        data_dir (Path): Path to the `data/raw` directory.
+        encoding (str): Force one encoding for all files instead of detecting.
+        workers (int): Parallel readers; defaults to the number of CPUs.
+            With 1, files are read in this process.
+        pool (str): "process" (scales with cores) or "thread".
+
+    Yields:
+        pd.DataFrame: One aligned frame per file, in sorted file name order.
+    """
+    csv_files = sorted(data_dir.glob("*.csv"))
+    if not csv_files:
+        raise FileNotFoundError(f"No CSV files in {data_dir}")
+    workers = min(workers or os.cpu_count() or 1, len(csv_files))
+    forced = [encoding] * len(csv_files)
+
+    if workers == 1:
+        probes = [probe_file(f, e) for f, e in zip(csv_files, forced)]
+        columns = align_schema(header for _, header in probes)
+        for f, (enc, _) in zip(csv_files, probes):
+            yield read_file(f, enc, columns)
+        return
+
+    with POOLS[pool](max_workers=workers) as executor:
+        probes = list(executor.map(probe_file, csv_files, forced))
+        columns = align_schema(header for _, header in probes)
+        encodings = [enc for enc, _ in probes]
+        yield from pool_map(
+            executor,
+            read_file,
+            csv_files,
+            encodings,
+            [columns] * len(csv_files),
+            workers=workers,
+        )
+
+
+def load_raw_data(
+    data_dir: Path, encoding: str = None, workers: int = None, pool: str = "process"
+) -> pd.DataFrame:
     """
     Load raw movie data from CSV files in the specified directory.
 
+    Files are read in parallel, but the combined frame holds the whole
+    catalogue in memory; `stream_raw_data` writes it out file by file instead.
+
     Args:
         data_dir (Path): Path to the `data/raw` directory.
+        encoding (str): Text encoding of the CSV files; detected per file
+            when not given (the IMDb file is cp1252, a common `windows`
+            encoding).
+        workers (int), pool (str): See `iter_raw_frames`.
 
     Returns:
         pd.DataFrame: Concatenated raw data.
@@ -16,13 +147,30 @@ def load_raw_data(data_dir: Path) -> pd.DataFrame:
 
     # Although for now I have only one dataset
     # I am assuming, there are several datasets. This ensures robustness
-    csv_files = list(data_dir.glob("*.csv"))
+    frames = iter_raw_frames(data_dir, encoding, workers, pool)
+    return pd.concat(frames, ignore_index=True)
 
-    # utf-8 cannot be used in this dataset. So, I used 'cp1252' encoding instead.
-    # It is a common encoding in `windows`
-    df_list = [pd.read_csv(f, encoding="cp1252") for f in csv_files]
-    df = pd.concat(df_list, ignore_index=True)
-    return df
+
+def stream_raw_data(
+    data_dir: Path,
+    output: Path,
+    encoding: str = None,
+    workers: int = None,
+    pool: str = "process",
+) -> int:
+    """
+    Like `load_raw_data`, but append each file to the `output` CSV as soon
+    as it is read, so only a few files are ever held in memory.
+
+    Returns:
+        int: Rows written.
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    for i, df in enumerate(iter_raw_frames(data_dir, encoding, workers, pool)):
+        df.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        n_rows += len(df)
+    return n_rows
 
 
 if __name__ == "__main__":
@@ -33,8 +181,23 @@ if __name__ == "__main__":
     parser.add_argument(
         "--output", type=Path, required=True, help="where to dump combined CSV"
     )
+    parser.add_argument(
+        "--encoding", type=str, default=None, help="force one encoding (default: detect)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="parallel readers (default: CPUs)"
+    )
+    parser.add_argument(
+        "--pool", choices=list(POOLS), default="process", help="worker pool type"
+    )
     args = parser.parse_args()
 
-    df = load_raw_data(args.input) if args.input.is_dir() else pd.read_csv(args.input)
-    args.output.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(args.output, index=False)
+    if args.input.is_dir():
+        n = stream_raw_data(
+            args.input, args.output, args.encoding, args.workers, args.pool
+        )
+        print(f"Wrote {n} rows to {args.output}")
+    else:
+        encoding = args.encoding or detect_encoding(args.input)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        pd.read_csv(args.input, encoding=encoding).to_csv(args.output, index=False)
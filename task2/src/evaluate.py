@@ -1,27 +1,205 @@
 import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import joblib
 from sklearn.metrics import root_mean_squared_error, mean_absolute_error, r2_score
 
+from data_loader import pool_map
+from features import load_features, load_sparse
+
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.artifacts import load_artifact  # noqa: E402
+
+
+def evaluate_model(model, X_test, y_true) -> dict:
+    # Predict on test set
+    preds = model.predict(X_test)
+
+    return {
+        "rmse": root_mean_squared_error(y_true, preds),
+        "mae": mean_absolute_error(y_true, preds),
+        "r2": r2_score(y_true, preds),
+    }
+
+
+class RunningMetrics:
+    """
+    RMSE, MAE and R2 accumulated chunk by chunk in constant memory.
+
+    Squared and absolute errors are summed. The mean and sum of squared
+    deviations of the true ratings are kept Welford-style: each chunk's are
+    combined with the running ones by Chan's parallel update, so the
+    denominator of R2 stays accurate without a second pass. Accumulators of
+    separate chunks can be merged in any order. The results equal sklearn's
+    on the full arrays up to floating-point rounding.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sse = 0.0  # sum of squared errors
+        self.sae = 0.0  # sum of absolute errors
+        self.mean = 0.0  # mean of y_true
+        self.m2 = 0.0  # sum of squared deviations of y_true from its mean
+
+    def update(self, y_true, preds) -> "RunningMetrics":
+        y_true = np.asarray(y_true, dtype=np.float64)
+        err = y_true - np.asarray(preds, dtype=np.float64)
+        chunk = RunningMetrics()
+        chunk.n = len(y_true)
+        if chunk.n:
+            chunk.sse = float(err @ err)
+            chunk.sae = float(np.abs(err).sum())
+            chunk.mean = float(y_true.mean())
+            chunk.m2 = float(((y_true - chunk.mean) ** 2).sum())
+        return self.merge(chunk)
+
+    def merge(self, other: "RunningMetrics") -> "RunningMetrics":
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta**2 * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.sse += other.sse
+        self.sae += other.sae
+        self.n = n
+        return self
+
+    def result(self) -> dict:
+        if self.m2 > 0:
+            r2 = 1 - self.sse / self.m2
+        else:
+            # Constant targets: sklearn's convention
+            r2 = 1.0 if self.sse == 0 else 0.0
+        return {
+            "rmse": (self.sse / self.n) ** 0.5,
+            "mae": self.sae / self.n,
+            "r2": r2,
+        }
+
+
+def iter_test_chunks(path: Path, chunksize: int, target: str = "Rating"):
+    """
+    Yield `(X, y)` chunks of at most `chunksize` rows from a features file.
+
+    CSVs are parsed chunk by chunk. A sparse `.npz` is compressed as a whole,
+    so it is loaded once and sliced; only the predictions are bounded.
+    """
+    path = Path(path)
+    if path.suffix != ".npz":
+        for df in pd.read_csv(path, chunksize=chunksize):
+            yield df.drop(columns=[target]), df[target].to_numpy()
+        return
+
+    X, columns = load_sparse(path)
+    idx = columns.index(target)
+    keep = [i for i in range(len(columns)) if i != idx]
+    for start in range(0, X.shape[0], chunksize):
+        rows = X[start : start + chunksize]
+        yield rows[:, keep], rows[:, idx].toarray().ravel()
+
+
+# Set once per worker process by _load_model
+_model = None
+
+
+def _load_model(model_path):
+    global _model
+    # Memory-mapped, so the workers share the forest's pages
+    _model = load_artifact(model_path, mmap=True)
+
+
+def _score_chunk(chunk) -> RunningMetrics:
+    X, y = chunk
+    return RunningMetrics().update(y, _model.predict(X))
+
+
+def evaluate_streaming(
+    model_path, test_path, chunksize: int = 10_000, workers: int = 1
+) -> dict:
+    """
+    Evaluate a saved model on a features file read `chunksize` rows at a time.
+
+    Only one chunk, its predictions and a `RunningMetrics` are held per
+    worker, so memory is bounded by the chunk size rather than the file.
+    With `workers` > 1 the chunks are predicted in a process pool with the
+    model memory-mapped in every worker, at most 2 x workers in flight.
+
+    Returns:
+        dict: `rmse`, `mae`, `r2`, plus `rows` and `rows_per_sec`.
+    """
+    start = time.perf_counter()
+    totals = RunningMetrics()
+    chunks = iter_test_chunks(test_path, chunksize)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _load_model(model_path)
+        for chunk in chunks:
+            totals.merge(_score_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(
+            workers, initializer=_load_model, initargs=(model_path,)
+        ) as pool:
+            # Chunks are read no faster than they are scored
+            for part in pool_map(pool, _score_chunk, chunks, workers=workers):
+                totals.merge(part)
+
+    seconds = time.perf_counter() - start
+    return {
+        **totals.result(),
+        "rows": totals.n,
+        "rows_per_sec": totals.n / seconds if seconds else float("nan"),
+    }
+
+
+def print_metrics(metrics: dict, prefix: str = "Test") -> None:
+    print(f"{prefix} RMSE: {metrics['rmse']:.4f}")
+    print(f"{prefix} MAE:  {metrics['mae']:.4f}")
+    print(f"{prefix} R2:   {metrics['r2']:.4f}")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Evaluate trained model")
     parser.add_argument("--model-path", type=str, required=True, help="model .pkl")
     parser.add_argument(
-        "--test-data", type=str, required=True, help="features CSV (with Rating)"
+        "--test-data",
+        type=str,
+        required=True,
+        help="features CSV or sparse .npz (with Rating)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream the test data in chunks of this many rows",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes predicting chunks in parallel with --chunksize",
     )
     args = parser.parse_args()
 
-    # Load test data
-    df = pd.read_csv(args.test_data)
-    y_true = df["Rating"]  # Extract true ratings
-    X_test = df.drop(columns=["Rating"])  # Drop target to get features only
+    if args.chunksize:
+        metrics = evaluate_streaming(
+            args.model_path, args.test_data, args.chunksize, args.workers
+        )
+        print_metrics(metrics)
+        rate = metrics["rows_per_sec"]
+        print(f"Scored {metrics['rows']:,} rows at {rate:,.0f} rows/s")
+        sys.exit()
 
-    # Load the trained model
-    model = joblib.load(args.model_path)
+    # Load test data, split into features and true ratings
+    X_test, y_true = load_features(args.test_data)
 
-    # Predict on test set
-    preds = model.predict(X_test)
+    # Load the trained model
+    model = load_artifact(args.model_path)
 
-    print(f"Test RMSE: {root_mean_squared_error(y_true, preds):.4f}")
-    print(f"Test MAE:  {mean_absolute_error(y_true, preds):.4f}")
-    print(f"Test R2:   {r2_score(y_true, preds):.4f}")
+    print_metrics(evaluate_model(model, X_test, y_true))
@@ -1,48 +1,307 @@
+import re
+
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer, make_column_selector
+from sklearn.feature_extraction import FeatureHasher
 from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 from pathlib import Path
 
+from preprocess import RawCleaner
+
+# Columns no longer needed after encoding, or hard to encode meaningfully
+DROP_COLUMNS = ["Name", "Genre", "Director", "Actor 1", "Actor 2", "Actor 3"]
+
+# Comma-separated genre tokens, trimmed so "Drama" and " Drama" are the same.
+# Untrimmed tokens gave two columns named genre_drama etc.; see README
+GENRE_TOKEN = r"[^,\s](?:[^,]*[^,\s])?"
+
+# The fitted feature pipeline is saved next to the model under this name
+PIPELINE_FILENAME = "feature_pipeline.pkl"
+
+# Hashing mode: token namespace per column (an actor hashes the same in any
+# billing slot), and the default number of hash buckets
+HASH_NAMESPACES = {
+    "Director": "director",
+    "Actor 1": "actor",
+    "Actor 2": "actor",
+    "Actor 3": "actor",
+    "Genre": "genre",
+}
+HASH_FEATURES = 2**12
+
+
+def genre_matrix(df: pd.DataFrame, col: str = "Genre"):
+    # Multi-label genres as a sparse count matrix
+    vect = CountVectorizer(token_pattern=GENRE_TOKEN)
+    mat = vect.fit_transform(df[col].fillna(""))
+    return mat.tocsr(), [f"genre_{g.strip()}" for g in vect.get_feature_names_out()]
+
+
+def top_category_matrix(df: pd.DataFrame, col: str, top_n: int = 30):
+    # One-hot of the `top_n` most frequent values, everything else → "Other"
+    top = df[col].value_counts().nlargest(top_n).index
+    cat = df[col].where(df[col].isin(top), other="Other")
+
+    enc = OneHotEncoder(handle_unknown="ignore")
+    mat = enc.fit_transform(cat.to_frame(f"{col}_cat"))
+    return mat.tocsr(), [f"{col}_{c}" for c in enc.categories_[0]]
+
 
 def encode_genre(df: pd.DataFrame, col: str = "Genre") -> pd.DataFrame:
     # Split multi-label genres into dummy columns
-    vect = CountVectorizer(token_pattern="[^,]+")
-    mat = vect.fit_transform(df[col].fillna(""))
-    genre_df = pd.DataFrame(
-        mat.toarray(),
-        columns=[f"genre_{g.strip()}" for g in vect.get_feature_names_out()],
-    )
+    mat, cols = genre_matrix(df, col)
+    genre_df = pd.DataFrame(mat.toarray(), columns=cols)
     return pd.concat([df.reset_index(drop=True), genre_df], axis=1)
 
 
 def encode_top_categories(df: pd.DataFrame, col: str, top_n: int = 30) -> pd.DataFrame:
-    top = df[col].value_counts().nlargest(top_n).index
-    cat_col = f"{col}_cat"
-    df[cat_col] = df[col].where(df[col].isin(top), other="Other")
-
-    enc = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-    arr = enc.fit_transform(df[[cat_col]])
-    cols = [f"{col}_{c}" for c in enc.categories_[0]]
-    cat_df = pd.DataFrame(arr, columns=cols)
+    mat, cols = top_category_matrix(df, col, top_n)
+    cat_df = pd.DataFrame(mat.toarray(), columns=cols)
 
     df = pd.concat([df.reset_index(drop=True), cat_df], axis=1)
-    return df.drop(columns=[col, cat_col])  # drop original + _cat columns
+    return df.drop(columns=[col])  # drop original column
 
 
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
+def build_features(df: pd.DataFrame, top_n: int = 30) -> pd.DataFrame:
     # Step 1: Multi-label encode genres
     df = encode_genre(df)
 
-    # Step 2: Encode top 30 Directors
-    df = encode_top_categories(df, "Director", top_n=30)
+    # Step 2: Encode top N (30 by default) Directors
+    df = encode_top_categories(df, "Director", top_n=top_n)
 
-    # Step 3: Encode top 30 Actor 1 values
-    df = encode_top_categories(df, "Actor 1", top_n=30)
+    # Step 3: Encode top N Actor 1 values
+    df = encode_top_categories(df, "Actor 1", top_n=top_n)
 
     # Step 4: Drop columns no longer needed or hard to encode meaningfully
-    drop = ["Name", "Genre", "Director", "Actor 1", "Actor 2", "Actor 3"]
+    return df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+
+
+def build_features_sparse(df: pd.DataFrame, top_n: int = 30):
+    """
+    Sparse counterpart of `build_features`.
+
+    Returns a CSR matrix with the same columns, in the same order, as the
+    DataFrame `build_features` would produce, plus the list of column names.
+    Nothing is densified, so memory grows with the number of non-zeros rather
+    than rows × (genres + 2 × top_n).
+    """
+    numeric = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    genre, genre_cols = genre_matrix(df)
+    director, director_cols = top_category_matrix(df, "Director", top_n)
+    actor, actor_cols = top_category_matrix(df, "Actor 1", top_n)
+
+    X = sp.hstack(
+        [sp.csr_matrix(numeric.to_numpy(dtype=float)), genre, director, actor],
+        format="csr",
+    )
+    return X, list(numeric.columns) + genre_cols + director_cols + actor_cols
+
+
+def _hash_tokens(df: pd.DataFrame):
+    # One token list per row: "director=<name>", "actor=<name>", "genre=<genre>"
+    columns = [
+        (HASH_NAMESPACES[c], df[c].tolist()) for c in HASH_NAMESPACES if c in df
+    ]
+    genre = re.compile(GENRE_TOKEN)
+    for values in zip(*(vals for _, vals in columns)):
+        tokens = []
+        for (ns, _), value in zip(columns, values):
+            if not isinstance(value, str):
+                continue
+            if ns == "genre":
+                tokens.extend(f"genre={g}" for g in genre.findall(value))
+            else:
+                tokens.append(f"{ns}={value}")
+        yield tokens
+
+
+def hash_matrix(df: pd.DataFrame, n_features: int = HASH_FEATURES):
+    """
+    Hash Director, Actor 1-3 and Genre tokens into `n_features` columns.
+
+    Stateless: there is no vocabulary, so any chunk of rows can be encoded on
+    its own, in any process, with the same columns, and unseen names need no
+    refit. Distinct names can share a bucket; more buckets mean fewer such
+    collisions.
+
+    Returns:
+        tuple: CSR count matrix and its column names, `hash_0` ... `hash_<n-1>`.
+    """
+    hasher = FeatureHasher(n_features, input_type="string", alternate_sign=False)
+    if not any(c in df for c in HASH_NAMESPACES):
+        mat = sp.csr_matrix((len(df), n_features))
+    else:
+        mat = hasher.transform(_hash_tokens(df)).tocsr()
+    return mat, [f"hash_{i}" for i in range(n_features)]
+
+
+def build_features_hashed(df: pd.DataFrame, n_features: int = HASH_FEATURES):
+    """
+    Hashing counterpart of `build_features_sparse`: numeric columns, then the
+    `hash_matrix` of the cast, director and genre columns, as one CSR matrix
+    with its column names.
+    """
+    numeric = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    hashed, hash_cols = hash_matrix(df, n_features)
+    X = sp.hstack(
+        [sp.csr_matrix(numeric.to_numpy(dtype=float)), hashed], format="csr"
+    )
+    return X, list(numeric.columns) + hash_cols
+
+
+class HashingEncoder(BaseEstimator, TransformerMixin):
+    """`hash_matrix` as a pipeline step; `fit` learns nothing."""
+
+    def __init__(self, n_features: int = HASH_FEATURES):
+        self.n_features = n_features
 
-    return df.drop(columns=[c for c in drop if c in df.columns])
+    def fit(self, X: pd.DataFrame, y=None):
+        return self
+
+    def transform(self, X: pd.DataFrame):
+        return hash_matrix(X, self.n_features)[0]
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array([f"hash_{i}" for i in range(self.n_features)])
+
+
+def _hash_inputs(X: pd.DataFrame) -> list:
+    # Hashed columns that survived RawCleaner's missing-value threshold
+    return [c for c in HASH_NAMESPACES if c in X.columns]
+
+
+class GenreVectorizer(CountVectorizer):
+    """`CountVectorizer` naming its columns `genre_<token>`, like `genre_matrix`."""
+
+    def get_feature_names_out(self, input_features=None):
+        names = super().get_feature_names_out(input_features)
+        return np.array([f"genre_{g}" for g in names], dtype=object)
+
+
+class TopCategoryEncoder(BaseEstimator, TransformerMixin):
+    """
+    One-hot encoder for the `top_n` most frequent values of a single column.
+
+    Works like `top_category_matrix`, but the vocabulary is learned in `fit`.
+    At transform time, values outside it, including names never seen, go to
+    the "Other" column.
+    """
+
+    def __init__(self, top_n: int = 30):
+        self.top_n = top_n
+
+    def fit(self, X: pd.DataFrame, y=None):
+        col = X.iloc[:, 0]
+        self.column_ = X.columns[0]
+        self.top_ = col.value_counts().nlargest(self.top_n).index.tolist()
+        self.encoder_ = OneHotEncoder(handle_unknown="ignore")
+        self.encoder_.fit(self._group(col).to_frame())
+        return self
+
+    def _group(self, col: pd.Series) -> pd.Series:
+        return col.where(col.isin(self.top_), other="Other")
+
+    def transform(self, X: pd.DataFrame):
+        return self.encoder_.transform(self._group(X.iloc[:, 0]).to_frame())
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array([f"{self.column_}_{c}" for c in self.encoder_.categories_[0]])
+
+
+def make_feature_pipeline(
+    top_n: int = 30, thresh: float = 0.5, hash_features: int = None
+) -> Pipeline:
+    """
+    Unfitted raw-CSV → feature-matrix transform: `RawCleaner`, then numeric
+    passthrough, genre counts and top-N Director / Actor 1 one-hots. With
+    `hash_features`, Director, Actor 1-3 and Genre are hashed into that many
+    columns instead (`HashingEncoder`).
+
+    Expects raw rows without the `Rating` target. Once fitted, it can be
+    saved next to the model and applied to any new batch.
+    """
+    numeric = ("num", "passthrough", make_column_selector(dtype_include=np.number))
+    if hash_features:
+        steps = [numeric, ("hash", HashingEncoder(hash_features), _hash_inputs)]
+    else:
+        steps = [
+            numeric,
+            ("genre", GenreVectorizer(token_pattern=GENRE_TOKEN), "Genre"),
+            ("director", TopCategoryEncoder(top_n), ["Director"]),
+            ("actor", TopCategoryEncoder(top_n), ["Actor 1"]),
+        ]
+    encode = ColumnTransformer(steps, verbose_feature_names_out=False)
+    return Pipeline([("clean", RawCleaner(thresh)), ("encode", encode)])
+
+
+def check_pipeline(pipeline: Pipeline, model) -> None:
+    """
+    Raise ValueError unless the fitted `pipeline` produces the columns `model`
+    was trained on, in the same order.
+
+    Models fitted on a features frame carry their column names and are
+    checked name by name; models fitted on a matrix only by column count.
+    """
+    names = [str(c) for c in pipeline["encode"].get_feature_names_out()]
+    expected = getattr(model, "feature_names_in_", None)
+    if expected is not None:
+        matches = names == [str(c) for c in expected]
+    else:
+        matches = len(names) == getattr(model, "n_features_in_", len(names))
+    if not matches:
+        raise ValueError(
+            f"The feature pipeline produces {len(names)} columns that do not "
+            f"match the {getattr(model, 'n_features_in_', '?')} the model was "
+            "trained on; refit both together with run.py or train.py --raw"
+        )
+
+
+def save_sparse(path: Path, X, columns) -> None:
+    # One .npz holding the CSR buffers and the column-name index
+    np.savez_compressed(
+        path,
+        data=X.data,
+        indices=X.indices,
+        indptr=X.indptr,
+        shape=X.shape,
+        columns=np.array(columns, dtype=str),
+    )
+
+
+def load_sparse(path: Path):
+    with np.load(path) as f:
+        X = sp.csr_matrix(
+            (f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"])
+        )
+        return X, f["columns"].tolist()
+
+
+def load_features(path: Path, target: str = "Rating"):
+    """
+    Load a features file written by this module and split off the target.
+
+    Args:
+        path (Path): Features CSV, or sparse `.npz` from `save_sparse`.
+        target (str): Name of the target column.
+
+    Returns:
+        tuple: `(X, y)`, where X is a DataFrame for CSV input or a CSR matrix
+        for `.npz` input, and y is a 1-D array-like.
+    """
+    path = Path(path)
+    if path.suffix != ".npz":
+        df = pd.read_csv(path)
+        return df.drop(columns=[target]), df[target]
+
+    X, columns = load_sparse(path)
+    idx = columns.index(target)
+    keep = [i for i in range(len(columns)) if i != idx]
+    return X[:, keep], X[:, idx].toarray().ravel()
 
 
 if __name__ == "__main__":
@@ -51,16 +310,35 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser("Build features")
     parser.add_argument("--input", type=Path, required=True, help="clean CSV")
     parser.add_argument(
-        "--output", type=Path, required=True, help="where to save feature CSV"
+        "--output",
+        type=Path,
+        required=True,
+        help="where to save features: CSV, or a sparse CSR matrix if it ends in .npz",
+    )
+    parser.add_argument(
+        "--hash-features",
+        type=int,
+        default=None,
+        help="hash cast, director and genre into this many columns (.npz output)",
     )
 
     args = parser.parse_args()
+    if args.hash_features and args.output.suffix != ".npz":
+        parser.error("--hash-features needs an --output ending in .npz")
 
     df = pd.read_csv(args.input)
-    df_feat = build_features(df)
 
-    assert not all(
-        pd.api.types.is_numeric_dtype(df_feat[col]) for col in df_feat.columns
-    ), "Non-numeric columns found!"
+    if args.hash_features:
+        X, columns = build_features_hashed(df, args.hash_features)
+        save_sparse(args.output, X, columns)
+    elif args.output.suffix == ".npz":
+        X, columns = build_features_sparse(df)
+        save_sparse(args.output, X, columns)
+    else:
+        df_feat = build_features(df)
+
+        assert not all(
+            pd.api.types.is_numeric_dtype(df_feat[col]) for col in df_feat.columns
+        ), "Non-numeric columns found!"
 
-    df_feat.to_csv(args.output, index=False)
+        df_feat.to_csv(args.output, index=False)
@@ -0,0 +1,86 @@
+import argparse
+import sys
+import pandas as pd
+import scipy.sparse as sp
+from pathlib import Path
+
+from data_loader import detect_encoding
+from features import PIPELINE_FILENAME, check_pipeline
+
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.artifacts import load_artifact  # noqa: E402
+from common.forest import compile_forest  # noqa: E402
+
+
+def predict_batches(
+    pipeline, model, path: Path, batch_size: int, encoding: str, columns=None
+):
+    """
+    Score a raw movie CSV in batches of `batch_size` rows.
+
+    Each batch goes through the fitted feature pipeline and the model. Memory
+    and time scale with the batch, not with the training catalogue. With
+    `columns`, the names the model was fitted with, each encoded batch is
+    passed to it as a frame with those names.
+
+    Yields:
+        pd.DataFrame: `Name` (when present) and `Predicted Rating` per batch.
+    """
+    for chunk in pd.read_csv(path, encoding=encoding, chunksize=batch_size):
+        X = pipeline.transform(chunk.drop(columns=["Rating"], errors="ignore"))
+        if columns is not None:
+            X = pd.DataFrame(X.toarray() if sp.issparse(X) else X, columns=columns)
+        out = chunk[["Name"]].copy() if "Name" in chunk.columns else pd.DataFrame()
+        out["Predicted Rating"] = model.predict(X)
+        yield out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Predict ratings for new raw movie data")
+    parser.add_argument("--input", type=Path, required=True, help="raw CSV file")
+    parser.add_argument(
+        "--output", type=Path, required=True, help="where to save predictions CSV"
+    )
+    parser.add_argument(
+        "--model-path",
+        type=Path,
+        default=Path("models/best_model.pkl"),
+        help=f"model .pkl; {PIPELINE_FILENAME} is read from the same folder",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10_000, help="rows scored at a time"
+    )
+    parser.add_argument(
+        "--encoding",
+        type=str,
+        default=None,
+        help="encoding of the input CSV; detected from the file when not given",
+    )
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="score with the flattened forest (same predictions, faster on small batches)",
+    )
+    args = parser.parse_args()
+    encoding = args.encoding or detect_encoding(args.input)
+
+    model = load_artifact(args.model_path)
+    pipeline = load_artifact(args.model_path.with_name(PIPELINE_FILENAME))
+    try:
+        check_pipeline(pipeline, model)
+    except ValueError as e:
+        parser.error(str(e))
+    columns = getattr(model, "feature_names_in_", None)
+    if args.compiled:
+        model = compile_forest(model)
+
+    # Append batch by batch so the full prediction set is never held in memory
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    batches = predict_batches(
+        pipeline, model, args.input, args.batch_size, encoding, columns
+    )
+    for i, preds in enumerate(batches):
+        preds.to_csv(
+            args.output, mode="w" if i == 0 else "a", header=i == 0, index=False
+        )
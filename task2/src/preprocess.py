@@ -1,22 +1,32 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from sklearn.base import BaseEstimator, TransformerMixin
 import argparse
 
 
+def _arrow_str(s: pd.Series) -> pd.Series:
+    # pyarrow-backed strings run the `.str` methods below as Arrow compute
+    # kernels over the whole column instead of a Python call per row
+    return s.astype("string[pyarrow]")
+
+
 def parse_year(df: pd.DataFrame, col: str = "Year") -> pd.DataFrame:
     # Extract the 4-digit year (e.g., from "2020 (India)") and convert it to float
-    df[col] = df[col].str.extract(r"(\d{4})").astype(float)
+    df[col] = _arrow_str(df[col]).str.extract(r"(\d{4})", expand=False).astype(float)
     return df
 
 
 def parse_duration(df: pd.DataFrame, col: str = "Duration") -> pd.DataFrame:
     # Extract numerical duration (e.g., from "120 min") and convert to float
-    df[col] = df[col].str.extract(r"(\d+)").astype(float)
+    df[col] = _arrow_str(df[col]).str.extract(r"(\d+)", expand=False).astype(float)
     return df
 
 
 def clean_votes_helper(x) -> float:
+    # Row-wise reference for a single value; `clean_votes` does the same
+    # on a whole column at once.
+
     # If the input is already a number, return it
     if isinstance(x, (float, int)):
         return x
@@ -33,16 +43,20 @@ def clean_votes_helper(x) -> float:
 
 
 def clean_votes(df: pd.DataFrame, col: str = "Votes") -> pd.DataFrame:
+    txt = _arrow_str(df[col]).str.lower()
+
     if col == "Votes":
-        df[col] = df[col].apply(clean_votes_helper)
-
-    df[col] = (
-        df[col]
-        .astype(str)
-        .str.replace(r"[+,]", "", regex=True)
-        .replace("nan", np.nan)
-        .astype(float)
-    )
+        # Strip "$" and flag "1.2M"-style values, scaled by 1e6 below
+        txt = txt.str.replace("$", "", regex=False)
+        millions = txt.str.contains("m", regex=False).fillna(False)
+        millions = millions.to_numpy(dtype=bool)
+        txt = txt.str.replace("m", "", regex=False)
+    else:
+        millions = np.zeros(len(txt), dtype=bool)
+
+    # Drop thousands separators and "+" suffixes; missing values stay NaN
+    values = txt.str.replace(r"[+,]", "", regex=True).astype(float).to_numpy()
+    df[col] = np.where(millions, values * 1e6, values)
     return df
 
 
@@ -50,18 +64,15 @@ def handle_missing(df: pd.DataFrame, thresh: float = 0.5) -> pd.DataFrame:
     # Drop columns with > thresh missing fraction
     df = df.loc[:, df.isnull().mean() < thresh]
 
-    # Numeric → median, Categorical → 'Unknown'
-    for c in df.select_dtypes(include=[np.number]).columns:
-        df = df.fillna({c: df[c].median()})
+    # Numeric → median, Categorical (object) → "Unknown", in one fillna so
+    # the frame is copied once rather than once per column
+    fills = df.select_dtypes(include=[np.number]).median().to_dict()
+    text = df.select_dtypes(include=[object, "string"]).columns
+    fills.update({c: "Unknown" for c in text})
+    return df.fillna(fills)
 
-    # For categorical (object) columns, fill missing with the string "Unknown"
-    for c in df.select_dtypes(include=[object]).columns:
-        df = df.fillna({c: "Unknown"})
 
-    return df
-
-
-def preprocess_raw(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_raw(df: pd.DataFrame, thresh: float = 0.5) -> pd.DataFrame:
     # Step-by-step data cleaning pipeline:
 
     # 1. Extract and convert year from string
@@ -74,10 +85,53 @@ def preprocess_raw(df: pd.DataFrame) -> pd.DataFrame:
     df = clean_votes(df)
 
     # 4. Handle missing data: drop sparse columns, fill other missing values
-    df = handle_missing(df)
+    df = handle_missing(df, thresh=thresh)
+    return df
+
+
+def parse_raw(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse Year, Duration and Votes, where present, on a copy of `df`."""
+    df = df.copy()
+    for col, parse in [
+        ("Year", parse_year),
+        ("Duration", parse_duration),
+        ("Votes", clean_votes),
+    ]:
+        if col in df.columns:
+            df = parse(df, col)
     return df
 
 
+class RawCleaner(BaseEstimator, TransformerMixin):
+    """
+    Fitted version of `preprocess_raw` for use in an sklearn Pipeline.
+
+    `fit` learns which columns to keep and the fill values (numeric medians,
+    "Unknown" for text) from the training data. `transform` parses and fills
+    any batch with those same values and columns, so new data is cleaned
+    exactly like the training data without refitting.
+    """
+
+    def __init__(self, thresh: float = 0.5):
+        self.thresh = thresh
+
+    def fit(self, X: pd.DataFrame, y=None):
+        df = parse_raw(X)
+        df = df.loc[:, df.isnull().mean() < self.thresh]
+
+        self.columns_ = df.columns.tolist()
+        text = df.select_dtypes(include=[object, "string"]).columns
+        self.fill_values_ = {c: "Unknown" for c in text}
+        self.fill_values_.update(
+            df.select_dtypes(include=[np.number]).median().to_dict()
+        )
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        df = parse_raw(X).reindex(columns=self.columns_)
+        return df.fillna(self.fill_values_)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Preprocess and split raw movie data")
     parser.add_argument("--input", type=Path, required=True, help="raw CSV file path")
@@ -0,0 +1,329 @@
+"""
+Out-of-core cleaning and encoding of raw movie CSVs in two streaming passes.
+
+Pass 1 reads the raw files chunk by chunk and collects `StreamStats`: exact
+null fractions, a `TDigest` per numeric column for its median, a
+`MisraGries` heavy-hitter counter for each top-N column, and exact genre
+token counts. The sketches have a fixed size and there are only a few dozen
+genres, so memory does not grow with the catalogue. The files are probed for
+their encodings and columns once, and both passes reuse the result.
+
+The statistics become a plan, which is the same set of decisions the
+in-memory code makes. It keeps the columns under the missing-value threshold,
+fills numeric columns with their median and text with "Unknown", counts
+genres, and one-hot encodes the top-N directors and lead actors with
+everything else as "Other". Pass 2 reads the files again and applies the plan
+chunk by chunk, appending rows to a features CSV with the same columns as
+`build_features`:
+
+    python src/streaming.py --input data/raw --output data/features.csv
+
+Medians are approximate (the t-digest's rank error is well under 1% at the
+median), and near-ties at the top-N cut-off may be ordered differently. On
+data that fits in memory the result otherwise matches
+`build_features(preprocess_raw(df))`.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from data_loader import align_schema, probe_file
+from features import DROP_COLUMNS, GENRE_TOKEN
+from preprocess import parse_raw
+
+# Columns one-hot encoded by their top-N values, as in `build_features`
+TOP_COLUMNS = ["Director", "Actor 1"]
+
+
+class TDigest:
+    """
+    Mergeable quantile sketch (merging t-digest with the k1 scale function).
+
+    Values are summarized as at most about `compression / 2` weighted
+    centroids. The centroids are small near the tails and wider in the
+    middle, so a quantile's rank error stays within a fraction of a percent.
+    Chunks are added with `update` (NaNs are ignored) and folded in with one
+    vectorized sort and group-by per call.
+    """
+
+    def __init__(self, compression: int = 500):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values) -> "TDigest":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self._compress(
+                np.concatenate([self.means, values]),
+                np.concatenate([self.weights, np.ones(len(values))]),
+            )
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if len(other.means):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(
+                np.concatenate([self.means, other.means]),
+                np.concatenate([self.weights, other.weights]),
+            )
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        q = (cum - weights / 2) / cum[-1]
+        # k1 scale: one unit of k per centroid, steep near q = 0 and q = 1
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        cluster = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float) -> float:
+        if not len(self.means):
+            return float("nan")
+        # Centroid means sit at the middle of their cumulative weight; the
+        # extremes bound the interpolation at both ends
+        total = self.weights.sum()
+        mids = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.r_[0.0, mids, total]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * total, ranks, values))
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+
+class MisraGries:
+    """
+    Mergeable heavy-hitter counter that keeps at most `capacity` values.
+
+    Chunk counts are added to the summary. When the summary grows past
+    `capacity`, the (capacity + 1)-th largest count is subtracted from all
+    counts and non-positive ones are dropped. Every kept count is then at
+    most `rows / (capacity + 1)` below the true count. Any value more
+    frequent than that is guaranteed to be kept, and with fewer than
+    `capacity` distinct values the counts are exact.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=float)
+        self.rows = 0
+
+    def update(self, counts: pd.Series) -> "MisraGries":
+        self.rows += int(counts.sum())
+        self.counts = self.counts.add(counts, fill_value=0)
+        if len(self.counts) > self.capacity:
+            cut = self.counts.nlargest(self.capacity + 1).iloc[-1]
+            self.counts = self.counts[self.counts > cut] - cut
+        return self
+
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        rows = self.rows + other.rows
+        self.update(other.counts)
+        self.rows = rows
+        return self
+
+    def top(self, n: int) -> list:
+        return self.counts.nlargest(n).index.tolist()
+
+
+class StreamStats:
+    """
+    One-pass statistics of parsed raw chunks: null fractions, medians, heavy
+    hitters of the `TOP_COLUMNS` and genre counts, in memory bounded by
+    `capacity` and `compression`.
+
+    Genres are counted exactly rather than sketched, so the vocabulary always
+    matches `build_features`.
+    """
+
+    def __init__(self, capacity: int = 1000, compression: int = 500):
+        self.capacity = capacity
+        self.compression = compression
+        self.rows = 0
+        self.columns = []
+        self.nulls = {}
+        self.digests = {}
+        self.text = set()
+        self.counters = {}
+        self.genres = pd.Series(dtype=float)
+
+    def update(self, df: pd.DataFrame) -> "StreamStats":
+        self.rows += len(df)
+        self.columns = align_schema([self.columns, list(df.columns)])
+        for col in df.columns:
+            values = df[col].dropna()
+            self.nulls[col] = self.nulls.get(col, 0) + len(df) - len(values)
+            if not len(values):
+                continue
+            if pd.api.types.is_numeric_dtype(values):
+                digest = self.digests.setdefault(col, TDigest(self.compression))
+                digest.update(values.to_numpy(dtype=float))
+            else:
+                self.text.add(col)
+                if col in TOP_COLUMNS:
+                    counter = self.counters.setdefault(col, MisraGries(self.capacity))
+                    counter.update(values.astype(str).value_counts())
+
+        if "Genre" in df.columns and df["Genre"].notna().any():
+            # Lowercased like the CountVectorizer in `genre_matrix`
+            tokens = df["Genre"].dropna().str.lower().str.findall(GENRE_TOKEN)
+            counts = tokens.explode().dropna().value_counts()
+            self.genres = self.genres.add(counts, fill_value=0)
+        return self
+
+    def null_fraction(self, col: str) -> float:
+        return self.nulls.get(col, 0) / self.rows if self.rows else 1.0
+
+    def _filled_counts(self, col: str) -> pd.Series:
+        # Value counts after missing values are filled with "Unknown"
+        filled = pd.Series({"Unknown": self.nulls.get(col, 0)})
+        return self.counters[col].counts.add(filled[filled > 0], fill_value=0)
+
+    def plan(self, thresh: float = 0.5, top_n: int = 30) -> dict:
+        """The kept columns, fill values, genre vocabulary and top-N values."""
+        columns = [c for c in self.columns if self.null_fraction(c) < thresh]
+        fill_values = {}
+        for col in columns:
+            # A column with text in any chunk is text, as read_csv would see it
+            if col in self.text:
+                fill_values[col] = "Unknown"
+            elif col in self.digests:
+                fill_values[col] = self.digests[col].median()
+
+        genres = set(self.genres.index)
+        if "Genre" in columns and self.nulls.get("Genre"):
+            genres.add("unknown")
+        top = {
+            col: self._filled_counts(col).nlargest(top_n).index.tolist()
+            for col in TOP_COLUMNS
+            if col in self.counters and col in columns
+        }
+        return {
+            "rows": self.rows,
+            "columns": columns,
+            "fill_values": fill_values,
+            "genres": sorted(genres),
+            "top": top,
+        }
+
+
+def clean_chunk(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """Keep the plan's columns of a parsed chunk and fill its missing values."""
+    return df.reindex(columns=plan["columns"]).fillna(plan["fill_values"])
+
+
+def encode_chunk(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """Genre counts and top-N one-hots of a cleaned chunk, as `build_features`."""
+    parts = [df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])]
+    if "Genre" in df.columns:
+        vect = CountVectorizer(token_pattern=GENRE_TOKEN, vocabulary=plan["genres"])
+        genre = vect.transform(df["Genre"].fillna("")).toarray()
+        columns = [f"genre_{g}" for g in plan["genres"]]
+        parts.append(pd.DataFrame(genre, columns=columns, index=df.index))
+    for col, top in plan["top"].items():
+        grouped = df[col].where(df[col].isin(top), other="Other")
+        categories = sorted(set(top) | {"Other"})
+        onehot = pd.get_dummies(
+            pd.Categorical(grouped, categories=categories), dtype=float
+        )
+        onehot.columns = [f"{col}_{c}" for c in categories]
+        parts.append(onehot.set_index(df.index))
+    return pd.concat(parts, axis=1)
+
+
+def probe_sources(source: Path):
+    """
+    The raw CSVs in `source` (a file or folder), each file's detected
+    encoding, and the union of their columns. Both passes read the files
+    through this one probe.
+    """
+    files = sorted(source.glob("*.csv")) if source.is_dir() else [source]
+    if not files:
+        raise FileNotFoundError(f"No CSV files in {source}")
+    probes = [probe_file(f) for f in files]
+    columns = align_schema(header for _, header in probes)
+    return files, [encoding for encoding, _ in probes], columns
+
+
+def iter_raw_chunks(sources, chunksize: int):
+    """Parsed chunks of the files probed by `probe_sources`."""
+    files, encodings, columns = sources
+    for f, encoding in zip(files, encodings):
+        for chunk in pd.read_csv(f, encoding=encoding, chunksize=chunksize):
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            yield parse_raw(chunk.reindex(columns=columns))
+
+
+def collect_stats(sources, chunksize: int, capacity: int = 1000) -> StreamStats:
+    """Pass 1: stream the probed `sources` once and collect their `StreamStats`."""
+    stats = StreamStats(capacity)
+    for chunk in iter_raw_chunks(sources, chunksize):
+        stats.update(chunk)
+    return stats
+
+
+def write_features(sources, output: Path, plan: dict, chunksize: int) -> int:
+    """Pass 2: clean and encode the probed `sources` chunk by chunk into `output`."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    for i, chunk in enumerate(iter_raw_chunks(sources, chunksize)):
+        features = encode_chunk(clean_chunk(chunk, plan), plan)
+        features.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        n_rows += len(features)
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Clean and encode raw movie data out of core")
+    parser.add_argument(
+        "--input", type=Path, required=True, help="raw CSV file or folder"
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="where to write the features CSV"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=50_000, help="rows read at a time"
+    )
+    parser.add_argument("--thresh", type=float, default=0.5, help="max null fraction")
+    parser.add_argument("--top-n", type=int, default=30, help="top-N to one-hot")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=1000,
+        help="values kept per heavy-hitter counter (at least --top-n)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sources = probe_sources(args.input)
+    stats = collect_stats(sources, args.chunksize, args.capacity)
+    plan = stats.plan(args.thresh, args.top_n)
+    pass1 = time.perf_counter() - start
+
+    # The plan is what a later run needs to encode new chunks the same way
+    plan_path = args.output.with_suffix(".plan.json")
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    plan_path.write_text(json.dumps(plan, indent=2))
+
+    n_rows = write_features(sources, args.output, plan, args.chunksize)
+    pass2 = time.perf_counter() - start - pass1
+    print(f"Pass 1 (statistics): {stats.rows:,} rows in {pass1:.1f}s")
+    print(f"Pass 2 (features):   {n_rows:,} rows in {pass2:.1f}s -> {args.output}")
+    print(f"Plan saved to {plan_path}")
@@ -1,62 +1,275 @@
 import argparse
+import sys
+import time
 import pandas as pd
-import joblib
 from pathlib import Path
-from sklearn.model_selection import train_test_split, GridSearchCV
+from scipy.stats import randint
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    train_test_split,
+    GridSearchCV,
+    HalvingGridSearchCV,
+    HalvingRandomSearchCV,
+)
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
 
+from data_loader import detect_encoding, load_raw_data
+from features import PIPELINE_FILENAME, load_features, make_feature_pipeline
 
-def train_model(X, y):
-    # Initialize base Random Forest Regressor
-    rf = RandomForestRegressor(random_state=42)
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.artifacts import save_artifact  # noqa: E402
+from common.sharding import scaling_report, train_sharded  # noqa: E402
 
-    # Define hyperparameter grid to search
-    params = {
-        "n_estimators": [50, 100],  # Number of trees in the forest
-        "max_depth": [None, 10, 20],  # Maximum depth of each tree
-    }
 
-    # Setup GridSearchCV to find best combination using 3-fold cross-validation
-    gs = GridSearchCV(
-        rf,
-        params,
+SEARCHES = ["grid", "halving", "random"]
+
+# Hyperparameter grid for "grid" and "halving"
+PARAM_GRID = {
+    "n_estimators": [50, 100],  # Number of trees in the forest
+    "max_depth": [None, 10, 20],  # Maximum depth of each tree
+}
+
+# Wider space sampled by "random"; only affordable because of successive halving
+PARAM_DISTRIBUTIONS = {
+    "max_depth": [None, 10, 20, 30],
+    "min_samples_leaf": randint(1, 10),
+    "max_features": [1.0, "sqrt", 0.5],
+}
+
+# Sharded training fits one fixed forest instead of searching
+SHARDED_PARAMS = {"n_estimators": max(PARAM_GRID["n_estimators"]), "max_depth": None}
+
+
+def train_model(X, y, search: str = "grid"):
+    """
+    Tune a RandomForestRegressor with 3-fold CV and return the best estimator.
+
+    Args:
+        search (str): "grid" tries every PARAM_GRID combination on all data.
+            "halving" runs successive halving over the same grid, with
+            `n_estimators` as the budget: every candidate starts with a few
+            trees and only the best third survive each round. "random" does
+            the same over candidates sampled from PARAM_DISTRIBUTIONS.
+    """
+    # Initialize base Random Forest Regressor
+    rf = RandomForestRegressor(random_state=42)
+    common = dict(
         cv=3,
         scoring="neg_root_mean_squared_error",  # Evaluation metric (negated RMSE)
         n_jobs=-1,  # Use all CPU cores for parallel processing
     )
 
-    # Train the model using all combinations
+    # Halving spends n_estimators as the resource, so it is not searched over
+    max_trees = max(PARAM_GRID["n_estimators"])
+    halving = dict(
+        resource="n_estimators", max_resources=max_trees, factor=3, random_state=42
+    )
+    grid = {k: v for k, v in PARAM_GRID.items() if k != "n_estimators"}
+
+    if search == "grid":
+        gs = GridSearchCV(rf, PARAM_GRID, **common)
+    elif search == "halving":
+        gs = HalvingGridSearchCV(
+            rf, grid, min_resources="exhaust", **halving, **common
+        )
+    elif search == "random":
+        # Start at 10 trees and sample as many candidates as the budget allows
+        gs = HalvingRandomSearchCV(
+            rf,
+            PARAM_DISTRIBUTIONS,
+            n_candidates="exhaust",
+            min_resources=10,
+            **halving,
+            **common,
+        )
+    else:
+        raise ValueError(f"Unknown search strategy: {search}")
+
+    start = time.perf_counter()
     gs.fit(X, y)
+    print(
+        f"{search} search: best CV RMSE {-gs.best_score_:.4f} "
+        f"in {time.perf_counter() - start:.1f}s with {gs.best_params_}"
+    )
 
-    # Return the best model found during grid search
+    # Return the best model found during the search
     return gs.best_estimator_
 
 
+def train_sharded_model(X, y, shards: int, workers: int = None):
+    """
+    Fit a `SHARDED_PARAMS` forest as `shards` sub-forests on disjoint row
+    shards, in `workers` processes, and merge them; see `common/sharding.py`.
+    """
+    rf = RandomForestRegressor(random_state=42, **SHARDED_PARAMS)
+    start = time.perf_counter()
+    model = train_sharded(rf, X, y, shards, workers, random_state=42)
+    print(
+        f"sharded fit: {shards} shards on {workers or 'all'} workers "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return model
+
+
+def validation_metrics(model, X_val, y_val) -> dict:
+    preds = model.predict(X_val)
+    return {
+        "rmse": root_mean_squared_error(y_val, preds),
+        "mae": mean_absolute_error(y_val, preds),
+        "r2": r2_score(y_val, preds),
+    }
+
+
+def train_and_validate(
+    X,
+    y,
+    test_size: float = 0.2,
+    random_state=42,
+    pipeline=None,
+    search="grid",
+    shards: int = 1,
+    workers: int = None,
+):
+    # X may be a DataFrame or a scipy.sparse matrix. With a feature `pipeline`,
+    # X holds raw rows and the pipeline is fitted on the training split only.
+    # With shards > 1 the search is skipped for one sharded SHARDED_PARAMS fit.
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=test_size, random_state=random_state
+    )
+
+    if pipeline is not None:
+        X_train = pipeline.fit_transform(X_train)
+        X_val = pipeline.transform(X_val)
+
+    if shards > 1:
+        model = train_sharded_model(X_train, y_train, shards, workers)
+    else:
+        model = train_model(X_train, y_train, search=search)
+
+    return model, validation_metrics(model, X_val, y_val)
+
+
+def shard_report(
+    X, y, shard_counts=None, test_size: float = 0.2, random_state=42, pipeline=None
+):
+    """
+    Speedup and validation RMSE/R2 change of sharded training at each shard
+    count, against the same forest fitted in one process.
+    """
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=test_size, random_state=random_state
+    )
+    if pipeline is not None:
+        X_train = pipeline.fit_transform(X_train)
+        X_val = pipeline.transform(X_val)
+    metrics = {
+        "rmse": lambda m, X, y: validation_metrics(m, X, y)["rmse"],
+        "r2": lambda m, X, y: validation_metrics(m, X, y)["r2"],
+    }
+    rf = RandomForestRegressor(random_state=random_state, **SHARDED_PARAMS)
+    return scaling_report(rf, X_train, y_train, X_val, y_val, metrics, shard_counts)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Train rating regression")
-    parser.add_argument(
-        "--data", type=Path, required=True, help="features CSV (with Rating)"
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--data",
+        type=Path,
+        help="features CSV or sparse .npz (with Rating)",
+    )
+    source.add_argument(
+        "--raw",
+        type=Path,
+        help=f"raw CSV file or folder; also fits and saves {PIPELINE_FILENAME}",
     )
     parser.add_argument(
         "--model-out", type=Path, required=True, help="where to save .pkl"
     )
+    parser.add_argument(
+        "--search",
+        choices=SEARCHES,
+        nargs="+",
+        default=["grid"],
+        help="search strategy; give several to compare them and keep the best",
+    )
+    parser.add_argument(
+        "--hash-features",
+        type=int,
+        default=None,
+        help="with --raw: hash director, actors and genres instead of top-N one-hots",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="skip the search; fit sub-forests on this many data shards in parallel",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes for --shards (default: CPUs)",
+    )
+    parser.add_argument(
+        "--shard-report",
+        type=int,
+        nargs="+",
+        metavar="SHARDS",
+        help="only compare sharded training at these shard counts with one process",
+    )
     args = parser.parse_args()
 
-    df = pd.read_csv(args.data)
-    y = df["Rating"]
-    X = df.drop(columns=["Rating"])
+    pipeline = None
+    if args.raw:
+        # Fit cleaning + encoding together with the model, on labelled rows only
+        if args.raw.is_dir():
+            df = load_raw_data(args.raw)
+        else:
+            df = pd.read_csv(args.raw, encoding=detect_encoding(args.raw))
+        df = df.dropna(subset=["Rating"])
+        X, y = df.drop(columns=["Rating"]), df["Rating"]
+        pipeline = make_feature_pipeline(hash_features=args.hash_features)
+    else:
+        X, y = load_features(args.data)
 
-    X_train, X_val, y_train, y_val = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    if args.shard_report:
+        report = shard_report(X, y, args.shard_report, pipeline=pipeline)
+        print(report.round(4).to_string(index=False))
+        sys.exit()
 
-    model = train_model(X_train, y_train)
+    results = []
+    for search in args.search:
+        start = time.perf_counter()
+        model, metrics = train_and_validate(
+            X,
+            y,
+            pipeline=pipeline,
+            search=search,
+            shards=args.shards,
+            workers=args.workers,
+        )
+        if args.shards > 1:
+            search = f"sharded-{args.shards}"
+        results.append((search, time.perf_counter() - start, model, metrics))
 
-    preds = model.predict(X_val)
-    print("Validation RMSE:", root_mean_squared_error(y_val, preds))
-    print("Validation MAE: ", mean_absolute_error(y_val, preds))
-    print("Validation R2:  ", r2_score(y_val, preds))
+        print("Validation RMSE:", metrics["rmse"])
+        print("Validation MAE: ", metrics["mae"])
+        print("Validation R2:  ", metrics["r2"])
+
+    if len(results) > 1:
+        print("\nSearch     Seconds  Val RMSE  Val R2")
+        for search, secs, _, metrics in results:
+            print(f"{search:<10}{secs:8.1f}{metrics['rmse']:10.4f}{metrics['r2']:8.4f}")
+
+    # Keep the model with the lowest validation RMSE
+    search, _, model, metrics = min(results, key=lambda r: r[3]["rmse"])
 
     args.model_out.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, args.model_out)
+    save_artifact(
+        model, args.model_out, metadata={"search": search, "validation": metrics}
+    )
+    if pipeline is not None:
+        save_artifact(pipeline, args.model_out.with_name(PIPELINE_FILENAME))
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from features import build_features, check_pipeline, make_feature_pipeline  # noqa: E402
+from preprocess import preprocess_raw  # noqa: E402
+
+RAW = pd.DataFrame(
+    {
+        "Name": ["A", "B", "C", "D", "E", "F"],
+        "Year": ["(2019)", "(2001 I)", np.nan, "(1998)", "(2010)", "(2015)"],
+        "Duration": ["120 min", np.nan, "95 min", "101 min", "88 min", "140 min"],
+        "Genre": [
+            "Drama",
+            "Drama, Action",
+            "Comedy",
+            np.nan,
+            "Action",
+            "Comedy, Drama",
+        ],
+        "Rating": [7.0, 6.5, 5.0, 8.1, 4.2, 6.0],
+        "Votes": ["1,234", "$56", "1.2M", np.nan, "87", "310"],
+        "Director": ["X", "Y", "X", "Z", np.nan, "X"],
+        "Actor 1": ["P", "Q", "P", "P", "R", np.nan],
+        "Actor 2": ["S", "T", "S", "T", "S", "T"],
+        "Actor 3": ["U", "V", "U", "V", "U", "V"],
+    }
+)
+
+
+def _fit(top_n=2):
+    features = build_features(preprocess_raw(RAW.copy()), top_n=top_n)
+    X, y = features.drop(columns=["Rating"]), features["Rating"]
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    pipeline = make_feature_pipeline(top_n=top_n).fit(RAW.drop(columns=["Rating"]))
+    return X, model, pipeline
+
+
+def test_pipeline_reproduces_build_features():
+    X, model, pipeline = _fit()
+    check_pipeline(pipeline, model)
+    got = pipeline.transform(RAW.drop(columns=["Rating"]))
+    got = got.toarray() if sp.issparse(got) else got
+    np.testing.assert_array_equal(got, X.to_numpy(dtype=float))
+
+
+def test_check_pipeline_rejects_other_columns():
+    _, model, _ = _fit(top_n=2)
+    other = make_feature_pipeline(top_n=1).fit(RAW.drop(columns=["Rating"]))
+    with pytest.raises(ValueError):
+        check_pipeline(other, model)
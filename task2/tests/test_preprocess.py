@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from benchmark_clean import CASES  # noqa: E402
+
+INPUTS = {
+    "Year": [np.nan, "", "(2019)", "(2019 I)", "2020 (India)", "(II) (1998)", "-"],
+    "Duration": [np.nan, "", "120 min", "95", "1 h 30", "min", "90min"],
+    "Votes": [np.nan, "$1,234", "1.2M", "$3.4m", "12,345", "87", 5, 7.5],
+}
+
+
+def _pair(col, legacy, vectorized, values):
+    frame = pd.DataFrame({col: pd.Series(values, dtype=object)})
+    expected = legacy(frame.copy(), col)[col]
+    got = vectorized(frame.copy(), col)[col]
+    return expected, got
+
+
+@pytest.mark.parametrize("col, legacy, vectorized", CASES, ids=[c for c, _, _ in CASES])
+def test_matches_legacy(col, legacy, vectorized):
+    expected, got = _pair(col, legacy, vectorized, INPUTS[col])
+    pd.testing.assert_series_equal(got, expected)
+
+
+@pytest.mark.parametrize("col, legacy, vectorized", CASES, ids=[c for c, _, _ in CASES])
+def test_matches_legacy_all_missing(col, legacy, vectorized):
+    expected, got = _pair(col, legacy, vectorized, [np.nan, np.nan])
+    pd.testing.assert_series_equal(got, expected)
+
+
+def test_votes_empty_string_raises_like_legacy():
+    # An empty vote count is not a number on either path
+    col, legacy, vectorized = next(case for case in CASES if case[0] == "Votes")
+    frame = pd.DataFrame({col: pd.Series(["10", ""], dtype=object)})
+    with pytest.raises(ValueError):
+        legacy(frame.copy(), col)
+    with pytest.raises(ValueError):
+        vectorized(frame.copy(), col)
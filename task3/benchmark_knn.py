@@ -0,0 +1,100 @@
+import argparse
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from knn import IndexedKNN
+from utils import FEATURES, load_config
+
+# The synthetic Iris generator lives in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common import synthetic  # noqa: E402
+
+# Recall vs latency of the KNN indexes against exact brute-force search, on
+# synthetic Iris rows. The measurements are rounded to 0.1 cm, so many rows
+# tie; a returned neighbour counts as correct when it is no farther than the
+# true k-th nearest.
+
+
+def run_index(name, params, X, y, Q, true_dist, true_pred, k):
+    model = IndexedKNN(n_neighbors=k, random_state=0, **params)
+    start = time.perf_counter()
+    model.fit(X, y)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dist, _ = model.kneighbors(Q)
+    query_s = time.perf_counter() - start
+    pred = model.predict(Q)
+
+    # Reference rows are rounded to 0.1, so a small slack absorbs float32 error
+    recall = (dist <= true_dist[:, -1:] + 1e-4).mean()
+    return {
+        "index": name,
+        "build s": build_s,
+        "index MB": len(pickle.dumps(model)) / 2**20,
+        "ms/query": 1000 * query_s / len(Q),
+        "queries/s": len(Q) / query_s,
+        f"recall@{k}": recall,
+        "same prediction": (pred == true_pred).mean(),
+    }
+
+
+if __name__ == "__main__":
+    config = load_config()
+
+    parser = argparse.ArgumentParser("Benchmark exact and approximate KNN indexes")
+    parser.add_argument("--rows", type=int, default=200_000, help="reference rows")
+    parser.add_argument("--queries", type=int, default=2_000, help="query rows")
+    parser.add_argument("--k", type=int, default=5, help="neighbours per query")
+    parser.add_argument(
+        "--n-probe",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="ivf probe counts to compare",
+    )
+    parser.add_argument("--n-jobs", type=int, default=1, help="query threads")
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path(config["model_path"]).with_name("knn_benchmark.csv"),
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = synthetic.iris(rng, args.rows + args.queries)
+    X, y = df[FEATURES].to_numpy()[: args.rows], df["species"][: args.rows]
+    Q = df[FEATURES].to_numpy()[args.rows :]
+
+    # Ground truth: exact brute-force search in float64
+    exact = IndexedKNN(n_neighbors=args.k, index="brute").fit(X, y)
+    true_dist, _ = exact.kneighbors(Q)
+    true_pred = exact.predict(Q)
+
+    common = {"n_jobs": args.n_jobs}
+    indexes = [
+        ("brute", {"index": "brute"}),
+        ("brute float32", {"index": "brute", "dtype": "float32"}),
+        ("kd_tree", {"index": "kd_tree"}),
+        ("ball_tree", {"index": "ball_tree"}),
+    ]
+    indexes += [
+        (f"ivf n_probe={n}", {"index": "ivf", "dtype": "float32", "n_probe": n})
+        for n in args.n_probe
+    ]
+    print(f"{args.rows:,} reference rows, {args.queries:,} queries, k={args.k}")
+    results = pd.DataFrame(
+        [
+            run_index(name, {**common, **params}, X, y, Q, true_dist, true_pred, args.k)
+            for name, params in indexes
+        ]
+    )
+    print(results.round(4).to_string(index=False))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.out, index=False)
+    print(f"Results saved to {args.out}")
@@ -0,0 +1,95 @@
+import io
+import json
+import logging
+import os
+import time
+
+import joblib
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, cross_val_score
+
+from utils import build_model
+
+
+def benchmark_candidate(model_type, params, X_train, y_train, X_test, y_test, seed):
+    # Runs in a worker process: CV, a final fit, then latency and size probes
+    model = build_model(model_type, random_state=seed, **params)
+    cv_acc = cross_val_score(model, X_train, y_train, cv=5, n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    # Predict latency on 1k rows, best of 3 to smooth out scheduling noise
+    rows = X_test.sample(1000, replace=True, random_state=seed)
+    latencies = []
+    for _ in range(3):
+        start = time.perf_counter()
+        model.predict(rows)
+        latencies.append(time.perf_counter() - start)
+
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+
+    result = {
+        "model_type": model_type,
+        "params": json.dumps(params, sort_keys=True),
+        "cv_accuracy": cv_acc.mean(),
+        "cv_std": cv_acc.std(),
+        "test_accuracy": accuracy_score(y_test, model.predict(X_test)),
+        "fit_s": fit_s,
+        "predict_ms_per_1k": min(latencies) * 1000,
+        "size_kb": buf.tell() / 1024,
+    }
+    return result, model
+
+
+def compare_models(X_train, y_train, X_test, y_test, config):
+    """
+    Cross-validate every family and parameter combination in
+    `config["compare_models"]` in parallel, one candidate per process.
+
+    The leaderboard is sorted by CV accuracy; ties go to the faster, then
+    smaller model. It is written to `leaderboard_path` as CSV and JSON.
+    Returns the fitted winner.
+    """
+    seed = config["random_state"]
+    candidates = [
+        (model_type, params)
+        for model_type, grid in config["compare_models"].items()
+        for params in ParameterGrid(grid)
+    ]
+    logging.info(f"Benchmarking {len(candidates)} candidates on all cores...")
+
+    results = Parallel(n_jobs=-1)(
+        delayed(benchmark_candidate)(
+            model_type, params, X_train, y_train, X_test, y_test, seed
+        )
+        for model_type, params in candidates
+    )
+
+    board = pd.DataFrame([r for r, _ in results])
+    # Round CV accuracy so noise-level differences do not decide the ranking
+    board["rank_accuracy"] = board["cv_accuracy"].round(3)
+    order = board.sort_values(
+        ["rank_accuracy", "predict_ms_per_1k", "size_kb"],
+        ascending=[False, True, True],
+    ).index
+    board = board.loc[order].drop(columns="rank_accuracy").reset_index(drop=True)
+
+    path = config["leaderboard_path"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    board.to_csv(path, index=False)
+    board.to_json(os.path.splitext(path)[0] + ".json", orient="records", indent=2)
+
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print("\nLeaderboard:\n", board.head(10).round(4))
+    winner = board.iloc[0]
+    logging.info(
+        f"Best model: {winner['model_type']} {winner['params']} "
+        f"(CV accuracy {winner['cv_accuracy']:.4f}, "
+        f"{winner['predict_ms_per_1k']:.2f} ms/1k rows, {winner['size_kb']:.1f} KB)"
+    )
+    return results[order[0]][1]
@@ -0,0 +1,225 @@
+"""
+K-nearest-neighbour classifier over an explicitly built, persisted index.
+
+`IndexedKNN` builds its index once in `fit`, and the index is pickled with
+the model, so a loaded model answers queries without rebuilding anything:
+
+- `kd_tree` / `ball_tree`: sklearn's `KDTree` / `BallTree`, exact. Query
+  cost grows with log(rows) rather than rows in low dimensions.
+- `brute`: exact distances to every reference row.
+- `ivf`: approximate. The reference rows are partitioned into `n_lists`
+  k-means cells (inverted file), and a query only scans the rows of its
+  `n_probe` nearest cells. A batch is scanned cell by cell, each cell
+  against all the queries that probe it, and the per-cell winners are
+  merged. More probes mean better recall and slower queries;
+  `benchmark_knn.py` measures the trade-off.
+
+`dtype="float32"` halves the memory of the `brute` and `ivf` reference rows
+and speeds up their distance computations. sklearn's trees always store
+float64, so the tree indexes ignore it.
+
+Queries are cut into batches of `batch_size` rows and run on `n_jobs`
+threads. Tree queries release the GIL, so they scale with cores. The brute
+and ivf distance computations run in NumPy, which releases it only in parts.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import BallTree, KDTree
+
+TREES = {"kd_tree": KDTree, "ball_tree": BallTree}
+INDEXES = [*TREES, "brute", "ivf"]
+
+
+def _sq_distances(A, B):
+    # Squared Euclidean distances between the rows of A and B, never negative
+    d = (A**2).sum(1)[:, None] - 2 * A @ B.T + (B**2).sum(1)[None, :]
+    return np.maximum(d, 0)
+
+
+class IndexedKNN(ClassifierMixin, BaseEstimator):
+    """
+    KNN classifier with a persisted `index`; see the module docstring.
+
+    Args:
+        n_neighbors (int): Neighbours that vote on each query.
+        weights (str): "uniform", or "distance" for 1/distance votes (exact
+            matches outvote everything else, as in sklearn).
+        index (str): "kd_tree", "ball_tree", "brute" or "ivf".
+        leaf_size (int): Leaf size of the tree indexes.
+        dtype (str): Storage type of the brute/ivf reference rows.
+        n_lists (int): ivf cells; defaults to sqrt(rows).
+        n_probe (int): ivf cells scanned per query.
+        batch_size (int): Query rows per batch.
+        n_jobs (int): Threads answering batches.
+        random_state (int): Seed of the ivf k-means.
+    """
+
+    def __init__(
+        self,
+        n_neighbors=5,
+        weights="uniform",
+        index="kd_tree",
+        leaf_size=40,
+        dtype="float64",
+        n_lists=None,
+        n_probe=8,
+        batch_size=1024,
+        n_jobs=1,
+        random_state=None,
+    ):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.index = index
+        self.leaf_size = leaf_size
+        self.dtype = dtype
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _as_array(self, X):
+        return np.ascontiguousarray(X, dtype=self.dtype)
+
+    def fit(self, X, y):
+        if self.index not in INDEXES:
+            raise ValueError(f"Unknown index {self.index!r}, expected one of {INDEXES}")
+        X = self._as_array(X)
+        self.classes_, labels = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+
+        if self.index in TREES:
+            self.tree_ = TREES[self.index](X, leaf_size=self.leaf_size)
+            self.labels_ = labels
+        elif self.index == "brute":
+            self.X_ = X
+            self.labels_ = labels
+        else:
+            n_lists = min(self.n_lists or max(1, int(np.sqrt(len(X)))), len(X))
+            kmeans = MiniBatchKMeans(
+                n_lists, n_init=3, random_state=self.random_state
+            ).fit(X)
+            # Rows stored cell by cell; cell c holds rows offsets_[c]:offsets_[c+1],
+            # and rows_ maps a stored position back to its training row number
+            order = np.argsort(kmeans.labels_, kind="stable")
+            self.X_ = X[order]
+            self.rows_ = order
+            self.labels_ = labels
+            self.centroids_ = kmeans.cluster_centers_.astype(self.dtype)
+            counts = np.bincount(kmeans.labels_, minlength=n_lists)
+            self.offsets_ = np.r_[0, np.cumsum(counts)]
+        return self
+
+    def _query(self, X):
+        # Distances and reference row numbers of the k nearest, nearest first
+        k = self.n_neighbors
+        if self.index in TREES:
+            return self.tree_.query(X, k=k)
+        if self.index == "brute":
+            # Query rows in blocks that keep the distance matrix near 2**24 cells
+            step = max(1, 2**24 // len(self.X_))
+            rows = np.arange(len(self.X_))
+            parts = [
+                self._nearest(X[i : i + step], self.X_, rows)
+                for i in range(0, len(X), step)
+            ]
+            return np.concatenate([d for d, _ in parts]), np.concatenate(
+                [j for _, j in parts]
+            )
+
+        n_probe = min(self.n_probe, len(self.centroids_))
+        cells = np.argpartition(
+            _sq_distances(X, self.centroids_), n_probe - 1, axis=1
+        )[:, :n_probe]
+        counts = np.diff(self.offsets_)[cells]
+        dist = np.empty((len(X), k))
+        ind = np.empty((len(X), k), dtype=np.intp)
+
+        short = counts.sum(axis=1) < k
+        if short.any():
+            # Too few candidates in the probed cells: scan everything
+            rows = np.arange(len(self.X_))
+            dist[short], ind[short] = self._nearest(X[short], self.X_, rows)
+
+        todo = np.flatnonzero(~short)
+        if len(todo):
+            dist[todo], ind[todo] = self._scan_cells(X[todo], cells[todo])
+        return dist, self.rows_[ind]
+
+    def _scan_cells(self, X, cells):
+        # One distance block per probed cell, against every query probing it
+        k = self.n_neighbors
+        n_probe = cells.shape[1]
+        found_d = np.full((len(X), n_probe * k), np.inf)
+        found_j = np.zeros((len(X), n_probe * k), dtype=np.intp)
+        flat = cells.ravel()
+        order = np.argsort(flat, kind="stable")
+        bounds = np.searchsorted(flat[order], np.arange(len(self.centroids_) + 1))
+        for c in np.flatnonzero(np.diff(bounds)):
+            lo, hi = self.offsets_[c], self.offsets_[c + 1]
+            if lo == hi:
+                continue
+            q, p = np.divmod(order[bounds[c] : bounds[c + 1]], n_probe)
+            d = _sq_distances(X[q], self.X_[lo:hi])
+            m = min(k, hi - lo)
+            top = np.argpartition(d, m - 1, axis=1)[:, :m]
+            slots = p[:, None] * k + np.arange(m)
+            found_d[q[:, None], slots] = np.take_along_axis(d, top, axis=1)
+            found_j[q[:, None], slots] = top + lo
+
+        # The k best of each query's per-cell winners; a query probing at
+        # least k rows always has k finite candidates
+        best = np.argpartition(found_d, k - 1, axis=1)[:, :k]
+        rows = np.take_along_axis(found_j, best, axis=1)
+        # The expanded form loses precision near zero; redo the k winners exactly
+        diff = X[:, None, :].astype(float) - self.X_[rows]
+        d_top = (diff**2).sum(axis=2)
+        order = np.argsort(d_top, axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        return np.sqrt(np.take_along_axis(d_top, order, axis=1)), rows
+
+    def _nearest(self, X, candidates, rows):
+        k = self.n_neighbors
+        d = _sq_distances(X, candidates)
+        top = np.argpartition(d, k - 1, axis=1)[:, :k]
+        # The expanded form loses precision near zero; redo the k winners exactly
+        diff = X[:, None, :].astype(float) - candidates[top]
+        d_top = (diff**2).sum(axis=2)
+        order = np.argsort(d_top, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return np.sqrt(np.take_along_axis(d_top, order, axis=1)), rows[top]
+
+    def kneighbors(self, X):
+        """Distances and training row numbers of each query's neighbours."""
+        X = self._as_array(X)
+        step = self.batch_size
+        batches = [X[i : i + step] for i in range(0, len(X), step)]
+        if self.n_jobs == 1 or len(batches) == 1:
+            results = [self._query(b) for b in batches]
+        else:
+            with ThreadPoolExecutor(self.n_jobs) as pool:
+                results = list(pool.map(self._query, batches))
+        dist = np.concatenate([d for d, _ in results])
+        ind = np.concatenate([i for _, i in results])
+        return dist, ind
+
+    def predict_proba(self, X):
+        dist, ind = self.kneighbors(X)
+        if self.weights == "distance":
+            with np.errstate(divide="ignore"):
+                w = 1 / dist
+            exact = np.isinf(w)
+            rows = exact.any(axis=1)
+            w[rows] = exact[rows]
+        else:
+            w = np.ones_like(dist)
+        votes = np.zeros((len(dist), len(self.classes_)))
+        np.add.at(votes, (np.arange(len(dist))[:, None], self.labels_[ind]), w)
+        return votes / votes.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
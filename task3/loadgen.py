@@ -0,0 +1,73 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import FEATURES, load_config
+
+# Benchmark client for serve.py: N threads, each with one keep-alive
+# connection, send single-row /predict requests as fast as they can.
+
+
+def worker(host, port, payloads, latencies, errors):
+    conn = http.client.HTTPConnection(host, port)
+    headers = {"Content-Type": "application/json"}
+    for body in payloads:
+        start = time.perf_counter()
+        conn.request("POST", "/predict", body=body, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - start)
+        if resp.status != 200:
+            errors.append(resp.status)
+    conn.close()
+
+
+if __name__ == "__main__":
+    config = load_config()
+
+    parser = argparse.ArgumentParser("Load test the Iris prediction server")
+    parser.add_argument("--host", default=config["serve_host"])
+    parser.add_argument("--port", type=int, default=config["serve_port"])
+    parser.add_argument("--requests", type=int, default=5000, help="total requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="client threads")
+    args = parser.parse_args()
+
+    # Requests cycle through the real measurements, one row each
+    rows = pd.read_csv(config["data_path"])[FEATURES].to_dict("records")
+    payloads = [json.dumps(rows[i % len(rows)]) for i in range(args.requests)]
+
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(
+                args.host,
+                args.port,
+                payloads[i :: args.concurrency],
+                latencies,
+                errors,
+            ),
+        )
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    print(f"Requests:    {len(lat)} ({len(errors)} errors) in {elapsed:.2f}s")
+    print(f"Throughput:  {len(lat) / elapsed:,.0f} req/s")
+    print(f"Latency p50: {np.percentile(lat, 50):.2f} ms")
+    print(f"Latency p99: {np.percentile(lat, 99):.2f} ms")
+
+    conn = http.client.HTTPConnection(args.host, args.port)
+    conn.request("GET", "/metrics")
+    print("Server metrics:", json.loads(conn.getresponse().read()))
@@ -0,0 +1,45 @@
+import argparse
+import logging
+import os
+
+import matplotlib
+
+matplotlib.use("Agg")  # render to files; never needs a display
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+# Logging setup
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def make_plots(df, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Pairplot
+    grid = sns.pairplot(df, hue="species")
+    grid.figure.suptitle("Iris Feature Pairwise Plots", y=1.02)
+    grid.savefig(os.path.join(out_dir, "pairplot.png"), bbox_inches="tight")
+    plt.close("all")
+
+    # Correlation heatmap
+    plt.figure(figsize=(6, 4))
+    sns.heatmap(df.corr(numeric_only=True), annot=True, cmap="YlGnBu")
+    plt.title("Feature Correlation Heatmap")
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "correlation_heatmap.png"))
+    plt.close()
+
+
+if __name__ == "__main__":
+    # Launched in the background by `train.py --plots`, or run on its own
+    parser = argparse.ArgumentParser("Render Iris dataset plots")
+    parser.add_argument("--data", required=True, help="Iris CSV")
+    parser.add_argument("--out-dir", required=True, help="folder for the PNGs")
+    args = parser.parse_args()
+
+    make_plots(pd.read_csv(args.data), args.out_dir)
+    logging.info(f"Plots saved to {args.out_dir}")
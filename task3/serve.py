@@ -0,0 +1,250 @@
+import json
+import logging
+import queue
+import threading
+import time
+import warnings
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from utils import FEATURES, load_artifact, load_config
+from common.forest import compile_forest  # utils puts the repository root on sys.path
+
+# Logging setup
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Batches are plain float arrays in FEATURES order; the model was fitted on a
+# DataFrame, so sklearn would warn about missing feature names on every call
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+class MicroBatcher:
+    """
+    Collects rows from concurrent requests and scores them together.
+
+    Request threads call `predict`, which queues their rows and waits. One
+    worker thread drains the queue into a batch of up to `max_batch_size`
+    rows, waiting at most `max_wait_ms` for it to fill, and runs a single
+    `model.predict` on the stacked array. If that call fails, each request in
+    the batch is retried on its own, so only the request at fault gets the
+    error.
+    """
+
+    def __init__(self, model, encoder, max_batch_size=64, max_wait_ms=2):
+        self.model = model
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.stats = Stats()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def predict(self, rows):
+        done = threading.Event()
+        job = {"rows": rows, "done": done, "result": None}
+        self.queue.put(job)
+        done.wait()
+        return job["result"]
+
+    def _labels(self, rows):
+        # Class names of `rows`, or the exception predicting them raised
+        try:
+            X = np.array(rows, dtype=float)
+            return self.encoder.inverse_transform(self.model.predict(X))
+        except Exception as e:  # reported back to the waiting request
+            return e
+
+    def _run(self):
+        while True:
+            jobs = [self.queue.get()]
+            n_rows = len(jobs[0]["rows"])
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                n_rows += len(jobs[-1]["rows"])
+
+            labels = self._labels([row for job in jobs for row in job["rows"]])
+            self.stats.record_batch()
+
+            if not isinstance(labels, Exception):
+                bounds = np.cumsum([0] + [len(job["rows"]) for job in jobs])
+                results = [labels[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+            elif len(jobs) == 1:
+                results = [labels]
+            else:
+                # One request's rows must not fail the others: retry each alone
+                results = [self._labels(job["rows"]) for job in jobs]
+            for job, result in zip(jobs, results):
+                job["result"] = result
+                job["done"].set()
+
+
+class Stats:
+    """
+    Thread-safe request latency and throughput counters.
+
+    Rates cover the last `rate_window_s` seconds, so they show the current load
+    rather than an average diluted by idle time since startup.
+    """
+
+    def __init__(self, window=10_000, rate_window_s=10):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)  # seconds, most recent requests
+        self.rate_window = rate_window_s
+        self.recent = deque()  # (finish time, rows) of requests in the window
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.predictions = 0
+        self.batches = 0
+
+    def _trim(self, now):
+        while self.recent and self.recent[0][0] < now - self.rate_window:
+            self.recent.popleft()
+
+    def record_request(self, latency, n_rows):
+        now = time.perf_counter()
+        with self.lock:
+            self.latencies.append(latency)
+            self.recent.append((now, n_rows))
+            self._trim(now)
+            self.requests += 1
+            self.predictions += n_rows
+
+    def record_batch(self):
+        with self.lock:
+            self.batches += 1
+
+    def snapshot(self):
+        with self.lock:
+            lat = np.array(self.latencies) * 1000
+            now = time.perf_counter()
+            self._trim(now)
+            elapsed = min(now - self.started, self.rate_window)
+            recent_rows = sum(n for _, n in self.recent)
+            return {
+                "requests": self.requests,
+                "predictions": self.predictions,
+                "batches": self.batches,
+                "mean_batch_size": self.predictions / max(self.batches, 1),
+                "p50_ms": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p99_ms": float(np.percentile(lat, 99)) if len(lat) else None,
+                "requests_per_sec": len(self.recent) / elapsed,
+                "predictions_per_sec": recent_rows / elapsed,
+            }
+
+
+def parse_rows(payload):
+    # Accepts one {"sepal_length": ..., ...} object or a list of them. Rows are
+    # checked here, before they can share a batch with other requests' rows
+    records = payload if isinstance(payload, list) else [payload]
+    if not records:
+        raise ValueError("no rows to predict")
+    rows = []
+    for i, r in enumerate(records):
+        if not isinstance(r, dict):
+            raise TypeError(f"row {i} is not an object of {FEATURES}")
+        row = [float(r[f]) for f in FEATURES]
+        if not np.isfinite(row).all():
+            raise ValueError(f"row {i} has a non-finite value")
+        rows.append(row)
+    return rows
+
+
+class PredictServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under load
+    request_queue_size = 1024
+
+
+def make_handler(batcher):
+    class PredictHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse connections
+        # Headers and body are separate small writes; with Nagle's algorithm on,
+        # the body waits for the client's delayed ACK on every response
+        disable_nagle_algorithm = True
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, batcher.stats.snapshot())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                rows = parse_rows(json.loads(self.rfile.read(length)))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {"error": f"bad request: {e}"})
+                return
+
+            labels = batcher.predict(rows)
+            if isinstance(labels, Exception):
+                self._send(500, {"error": str(labels)})
+                return
+            batcher.stats.record_request(time.perf_counter() - start, len(rows))
+            self._send(200, {"predictions": labels.tolist()})
+
+        def log_message(self, format, *args):
+            pass  # per-request access logs would dominate the hot path
+
+    return PredictHandler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser("Serve Iris predictions over HTTP")
+    parser.add_argument("--host", default=config["serve_host"])
+    parser.add_argument("--port", type=int, default=config["serve_port"])
+    parser.add_argument(
+        "--max-batch-size", type=int, default=config["max_batch_size"]
+    )
+    parser.add_argument("--max-wait-ms", type=float, default=config["max_wait_ms"])
+    args = parser.parse_args()
+
+    # Artifacts are loaded once and stay warm for the life of the process
+    logging.info("Loading model and encoder...")
+    model = load_artifact(config["model_path"])
+    if config["compiled_forest"] and isinstance(model, RandomForestClassifier):
+        # Same predictions, without sklearn's per-call dispatch over the trees
+        model = compile_forest(model)
+        logging.info(f"Compiled {model.n_trees} trees for inference")
+    batcher = MicroBatcher(
+        model,
+        load_artifact(config["encoder_path"]),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+
+    server = PredictServer((args.host, args.port), make_handler(batcher))
+    logging.info(f"Serving on http://{args.host}:{args.port} (POST /predict)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -1,7 +1,6 @@
 import logging
 import pandas as pd
-from utils import load_artifact
-import yaml
+from utils import load_artifact, load_config
 
 # Logging setup
 logging.basicConfig(
@@ -9,8 +8,7 @@ logging.basicConfig(
 )
 
 # Load config
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+config = load_config()
 
 # Sample data to predict
 sample = pd.DataFrame(
@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from knn import INDEXES, IndexedKNN  # noqa: E402
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(2000, 4))
+y = (X[:, 0] + X[:, 1] > 0).astype(int)
+
+
+@pytest.mark.parametrize("index", INDEXES)
+def test_training_row_is_its_own_nearest_neighbour(index):
+    model = IndexedKNN(n_neighbors=3, index=index, random_state=0).fit(X, y)
+    rows = np.arange(50)
+    dist, ind = model.kneighbors(X[rows])
+    np.testing.assert_array_equal(ind[:, 0], rows)
+    np.testing.assert_allclose(dist[:, 0], 0, atol=1e-6)
+
+
+@pytest.mark.parametrize("index", ["kd_tree", "brute"])
+def test_exact_indexes_match_sklearn(index):
+    model = IndexedKNN(n_neighbors=5, index=index).fit(X, y)
+    reference = KNeighborsClassifier(n_neighbors=5).fit(X, y)
+    Q = rng.normal(size=(200, 4))
+    np.testing.assert_array_equal(model.predict(Q), reference.predict(Q))
+
+
+def test_ivf_predicts_from_its_neighbours_labels():
+    model = IndexedKNN(n_neighbors=5, index="ivf", n_probe=4, random_state=0)
+    model.fit(X, y)
+    Q = rng.normal(size=(200, 4))
+    _, ind = model.kneighbors(Q)
+    majority = (y[ind].mean(axis=1) > 0.5).astype(int)
+    np.testing.assert_array_equal(model.predict(Q), majority)
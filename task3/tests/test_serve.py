@@ -0,0 +1,63 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from serve import MicroBatcher, parse_rows  # noqa: E402
+from utils import FEATURES  # noqa: E402
+
+
+class Picky:
+    """Predicts class 0, but rejects any batch holding a negative value."""
+
+    def predict(self, X):
+        if (X < 0).any():
+            raise ValueError("negative measurement")
+        return np.zeros(len(X), dtype=int)
+
+
+class Names:
+    def inverse_transform(self, y):
+        return np.array(["setosa", "versicolor"])[y]
+
+
+def row(value):
+    return {f: value for f in FEATURES}
+
+
+@pytest.mark.parametrize(
+    "payload", [[], [row(float("nan"))], [row(1.0), row(float("inf"))], [[1, 2, 3, 4]]]
+)
+def test_parse_rows_rejects_bad_rows(payload):
+    with pytest.raises((ValueError, TypeError)):
+        parse_rows(payload)
+
+
+def test_parse_rows_accepts_one_object_or_a_list():
+    assert parse_rows(row(1)) == [[1.0] * len(FEATURES)]
+    assert len(parse_rows([row(1), row(2)])) == 2
+
+
+def test_bad_request_does_not_fail_its_batch():
+    # A long wait puts all three requests in one batch
+    batcher = MicroBatcher(Picky(), Names(), max_batch_size=64, max_wait_ms=200)
+    requests = [[[1.0] * 4], [[-1.0] * 4], [[2.0] * 4, [3.0] * 4]]
+    results = [None] * len(requests)
+
+    def send(i):
+        results[i] = batcher.predict(requests[i])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert batcher.stats.batches == 1
+    assert results[0].tolist() == ["setosa"]
+    assert isinstance(results[1], ValueError)
+    assert results[2].tolist() == ["setosa", "setosa"]
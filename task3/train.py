@@ -1,14 +1,28 @@
+import argparse
 import logging
-import yaml
-import seaborn as sns
-import matplotlib.pyplot as plt
+import subprocess
+import sys
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
 from sklearn.metrics import classification_report, accuracy_score
 
-from utils import load_data, preprocess, save_artifact
+from utils import build_model, load_config, load_data, preprocess, save_artifact
+
+# utils has put the repository root, and with it common/, on sys.path
+from common import instrument  # noqa: E402
+
+parser = argparse.ArgumentParser("Train the Iris classifier")
+parser.add_argument(
+    "--compare",
+    action="store_true",
+    help="benchmark every model in `compare_models` and keep the best one",
+)
+parser.add_argument(
+    "--plots",
+    action="store_true",
+    help="render dataset plots in a background process (or set `plots` in config)",
+)
+instrument.add_arguments(parser, metrics_dir=load_config()["metrics_dir"])
+args = parser.parse_args()
 
 # Setup logging
 logging.basicConfig(
@@ -16,63 +30,75 @@ logging.basicConfig(
 )
 
 # Load config
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+config = load_config()
 
 MODEL_TYPE = config["model_type"]
 TEST_SIZE = config["test_size"]
 RANDOM_STATE = config["random_state"]
 
-# Load and visualize dataset
-logging.info("Loading dataset...")
-df = load_data()
-
 # ------- VISUALIZATION SECTION -------
-logging.info("Generating visualizations...")
-
-# Pairplot
-sns.pairplot(df, hue="species")
-plt.suptitle("Iris Feature Pairwise Plots", y=1.02)
-plt.tight_layout()
-plt.show()
-
-# Correlation heatmap
-plt.figure(figsize=(6, 4))
-sns.heatmap(df.corr(numeric_only=True), annot=True, cmap="YlGnBu")
-plt.title("Feature Correlation Heatmap")
-plt.tight_layout()
-plt.show()
-
-# ------- PREPROCESSING -------
-logging.info("Preprocessing data...")
-X, y, encoder = preprocess(df)
-
-# Train/Test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
-)
+# Plots are rendered by report.py in a separate process so training never
+# imports matplotlib/seaborn or waits on rendering
+report = None
+if args.plots or config.get("plots", False):
+    logging.info("Generating visualizations in the background...")
+    report = subprocess.Popen(
+        [
+            sys.executable,
+            "report.py",
+            "--data",
+            config["data_path"],
+            "--out-dir",
+            config["plots_dir"],
+        ]
+    )
+
+# Stage timings and peak memory go to <metrics_dir>/train-<time>.json
+with instrument.run(
+    "train", out_dir=args.metrics_dir, profile=args.profile, memory=args.memory
+) as run:
+    # Load dataset
+    logging.info("Loading dataset...")
+    with instrument.stage("load"):
+        df = load_data()
+
+    # ------- PREPROCESSING -------
+    logging.info("Preprocessing data...")
+    with instrument.stage("preprocess"):
+        X, y, encoder = preprocess(df)
+
+        # Train/Test split
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+
+    # ------- MODEL SELECTION -------
+    with instrument.stage("fit"):
+        if args.compare:
+            from compare import compare_models
+
+            logging.info("Comparing all configured models...")
+            model = compare_models(X_train, y_train, X_test, y_test, config)
+        else:
+            logging.info(f"Training model: {MODEL_TYPE}")
+            model = build_model(MODEL_TYPE, random_state=RANDOM_STATE)
+
+            # Train the model
+            model.fit(X_train, y_train)
+
+    # Evaluation
+    with instrument.stage("predict"):
+        y_pred = model.predict(X_test)
+    acc = accuracy_score(y_test, y_pred)
+    run.record(model=type(model).__name__, test_accuracy=acc)
+    logging.info(f"Model Accuracy: {acc:.4f}")
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+
+    # Save artifacts
+    with instrument.stage("save"):
+        save_artifact(model, config["model_path"], test_accuracy=acc)
+        save_artifact(encoder, config["encoder_path"])
+    logging.info("Model and encoder saved.")
 
-# ------- MODEL SELECTION -------
-logging.info(f"Training model: {MODEL_TYPE}")
-if MODEL_TYPE == "RandomForest":
-    model = RandomForestClassifier(random_state=RANDOM_STATE)
-elif MODEL_TYPE == "KNN":
-    model = KNeighborsClassifier()
-elif MODEL_TYPE == "SVM":
-    model = SVC()
-else:
-    raise ValueError("Invalid model type in config.yaml")
-
-# Train the model
-model.fit(X_train, y_train)
-
-# Evaluation
-y_pred = model.predict(X_test)
-acc = accuracy_score(y_test, y_pred)
-logging.info(f"Model Accuracy: {acc:.4f}")
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-
-# Save artifacts
-save_artifact(model, config["model_path"])
-save_artifact(encoder, config["encoder_path"])
-logging.info("Model and encoder saved.")
+if report is not None and report.wait() != 0:
+    logging.warning("Plot rendering failed, see the output above")
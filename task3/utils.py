@@ -1,17 +1,42 @@
-import pandas as pd
 from sklearn.preprocessing import LabelEncoder
-import joblib
-import os
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.svm import SVC
+from functools import lru_cache
+from pathlib import Path
+import sys
 import yaml
 
-with open("config.yaml", "r") as config_file:
-    config = yaml.safe_load(config_file)
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common import artifacts  # noqa: E402
+from common.datasets import load_csv  # noqa: E402
+from knn import IndexedKNN  # noqa: E402
 
-DATA_PATH = config["data_path"]
+FEATURES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+
+@lru_cache(maxsize=None)
+def load_config(path="config.yaml"):
+    # Parsed once per process, however many modules ask for it
+    with open(path, "r") as config_file:
+        return yaml.safe_load(config_file)
 
 
 def load_data():
-    return pd.read_csv(DATA_PATH)
+    # Parsed once, then memory-mapped from data/.cache/
+    return load_csv(load_config()["data_path"])
+
+
+def build_model(model_type, random_state=None, **params):
+    if model_type == "RandomForest":
+        return RandomForestClassifier(random_state=random_state, **params)
+    elif model_type == "KNN":
+        # Index settings from config.yaml, overridden by explicit params
+        params = {**load_config().get("knn", {}), **params}
+        return IndexedKNN(random_state=random_state, **params)
+    elif model_type == "SVM":
+        return SVC(**params)
+    raise ValueError("Invalid model type in config.yaml")
 
 
 def preprocess(df):
@@ -22,10 +47,13 @@ def preprocess(df):
     return X, y, le
 
 
-def save_artifact(obj, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    joblib.dump(obj, path)
+def save_artifact(obj, path, **metadata):
+    # Extra keyword arguments are recorded in the artifact's .meta.json sidecar
+    config = load_config()
+    return artifacts.save_artifact(
+        obj, path, compress=config["artifact_compress"], metadata=metadata
+    )
 
 
 def load_artifact(path):
-    return joblib.load(path)
+    return artifacts.load_artifact(path, mmap=load_config()["artifact_mmap"])
@@ -1,15 +1,81 @@
 import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
 from src.utils import setup_logging
-from src.preprocess import load_and_preprocess_data
-from src.train import train_model
-from src.evaluate import evaluate_model
+from src.preprocess import (
+    load_and_preprocess_data,
+    load_and_preprocess_data_streaming,
+    iter_batches,
+)
+from sklearn.model_selection import train_test_split
+from src.train import save_model, train_model, update_model
+from src.benchmark import run_benchmark, run_shard_report
+from src.evaluate import evaluate_model, tune_threshold
+from src.config import CHUNK_SIZE, CV_FOLDS, DATA_PATH, RANDOM_STATE, VALIDATION_SIZE
+
+# The shared instrumentation lives in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common import instrument  # noqa: E402
 
 
 def main(args):
     setup_logging()
-    X_train, X_test, y_train, y_test = load_and_preprocess_data()
-    model = train_model(X_train, y_train, model_type=args.model)
-    evaluate_model(model, X_test, y_test)
+
+    # Plots render in their own process, off the training path
+    report = None
+    if args.plots:
+        report = subprocess.Popen([sys.executable, "-m", "src.report"])
+
+    if args.shard_report:
+        mode = "shard-report"
+    elif args.benchmark:
+        mode = "benchmark"
+    else:
+        mode = "update" if args.incremental else "train"
+    # Benchmark fits are timed untraced and traced separately by the benchmark
+    with instrument.run(
+        f"{mode}-{args.model}",
+        out_dir=args.metrics_dir,
+        profile=args.profile,
+        memory=args.memory and mode != "benchmark",
+    ) as run:
+        if args.shard_report:
+            run_shard_report()
+        elif args.benchmark:
+            run_benchmark(args.model, n_folds=args.folds, workers=args.workers)
+        elif args.incremental:
+            update_model(iter_batches(args.data, args.chunksize), model_type=args.model)
+        else:
+            run.record(**train_and_evaluate(args))
+
+    if report is not None:
+        report.wait()
+
+
+def train_and_evaluate(args):
+    if args.stream:
+        X_train, X_test, y_train, y_test, scaler = load_and_preprocess_data_streaming(
+            chunksize=args.chunksize
+        )
+    else:
+        X_train, X_test, y_train, y_test, scaler = load_and_preprocess_data()
+
+    # Hold out part of the training data to tune the decision threshold on
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train,
+        y_train,
+        test_size=VALIDATION_SIZE,
+        stratify=y_train,
+        random_state=RANDOM_STATE,
+    )
+    model = train_model(
+        X_fit, y_fit, model_type=args.model, shards=args.shards, workers=args.workers
+    )
+    threshold = tune_threshold(y_val, model.predict_proba(X_val)[:, 1])
+    save_model(model, scaler, threshold)
+    return {"threshold": threshold, **evaluate_model(model, X_test, y_test, threshold)}
 
 
 if __name__ == "__main__":
@@ -18,8 +84,64 @@ if __name__ == "__main__":
         "--model",
         type=str,
         default="logreg",
-        choices=["logreg", "rf"],
-        help="Model type to use: logreg or rf",
+        choices=["logreg", "rf", "sgd"],
+        help="Model type to use: logreg, rf or sgd",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the CSV in chunks instead of loading it into memory",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=CHUNK_SIZE,
+        help="Rows per chunk in --stream and --incremental mode",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the saved sgd/rf model with new batches instead of retraining",
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default=DATA_PATH,
+        help="Labelled CSV with the new transactions for --incremental",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Compare undersampling ratios and class weights with k-fold CV",
+    )
+    parser.add_argument(
+        "--folds",
+        type=int,
+        default=CV_FOLDS,
+        help="Stratified folds in --benchmark mode",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel fits in --benchmark and --shards mode (default: CPUs)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Train rf as this many sub-forests on disjoint data shards, then merge",
+    )
+    parser.add_argument(
+        "--shard-report",
+        action="store_true",
+        help="Time sharded rf training against one process on the full dataset",
+    )
+    parser.add_argument(
+        "--plots",
+        action="store_true",
+        help="Render dataset plots to outputs/plots in a background process",
     )
+    instrument.add_arguments(parser, metrics_dir=os.path.join("outputs", "metrics"))
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,258 @@
+"""
+Cross-validated comparison of class-imbalance strategies.
+
+    python main.py --model logreg --benchmark --folds 5 --workers 4
+
+Every configuration is trained and scored on the same stratified k-fold
+split of the full creditcard.csv:
+
+- `undersample 1:r`: genuine rows of the training fold are sampled down to
+  `r` times its fraud rows (the in-memory pipeline uses `UNDERSAMPLE_RATIO`).
+- `class_weight w`: no undersampling; the fraud class is weighted `w` (or
+  "balanced") in the loss. `None` is the unweighted baseline.
+
+Test folds are never resampled, so PR-AUC and recall are measured at the real
+fraud rate. Each (configuration, fold) pair runs as its own task in a process
+pool. The features are written once as a contiguous `.npy` file, filled
+column by column from the dataset cache. Workers memory-map it and copy
+only the rows of their fold.
+
+Per configuration the fold means (and standard deviations) of fit time,
+tracemalloc peak memory of the fit, PR-AUC, and precision/recall at 0.5 are
+written to `BENCHMARK_PATH`. Fit times come from an untraced fit, since
+allocation tracing slows each configuration by a different amount; the peak
+memory comes from a second, traced fit of the same fold. The cheapest configuration whose mean recall
+reaches `RECALL_TARGET` is reported.
+
+`run_shard_report` times sharded rf training instead:
+
+    python main.py --model rf --shard-report
+
+A 100-tree forest is fitted on a stratified split of the full dataset in one
+process, then as merged sub-forests over each of `SHARD_COUNTS` shards.
+Speedup and the change in test PR-AUC and F1 go to `SHARD_REPORT_PATH`.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (
+    average_precision_score,
+    f1_score,
+    precision_score,
+    recall_score,
+)
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from src.config import (
+    BENCHMARK_CLASS_WEIGHTS,
+    BENCHMARK_PATH,
+    BENCHMARK_RATIOS,
+    CV_FOLDS,
+    DATA_PATH,
+    RANDOM_STATE,
+    RECALL_TARGET,
+    SHARD_COUNTS,
+    SHARD_REPORT_PATH,
+    TEST_SIZE,
+)
+from src.preprocess import FEATURE_COLUMNS
+from src.train import train_model
+
+# The shared dataset loader and stage timer live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.datasets import load_csv  # noqa: E402
+from common.instrument import stage  # noqa: E402
+from common.sharding import scaling_report  # noqa: E402
+
+# Set once per worker process by _load
+_X = _y = None
+
+
+def _write_arrays(out_dir, path=DATA_PATH):
+    # Features as one .npy matrix, filled a column at a time so that no full
+    # in-memory copy of the dataset is ever built, and the labels
+    df = load_csv(path, columns=FEATURE_COLUMNS + ["Class"])
+    X_path, y_path = Path(out_dir) / "X.npy", Path(out_dir) / "y.npy"
+    X = np.lib.format.open_memmap(
+        X_path, mode="w+", dtype=np.float64, shape=(len(df), len(FEATURE_COLUMNS))
+    )
+    for j, col in enumerate(FEATURE_COLUMNS):
+        X[:, j] = df[col].to_numpy()
+    X.flush()
+    del X
+    np.save(y_path, df["Class"].to_numpy())
+    return X_path, y_path
+
+
+def _load(X_path, y_path):
+    # Memory-mapped read-only; fold rows are copied out by fancy indexing
+    global _X, _y
+    _X = np.load(X_path, mmap_mode="r")
+    _y = np.load(y_path)
+
+
+def _unload():
+    # Drop the memory map so its temporary folder can be removed on Windows too
+    global _X, _y
+    _X = _y = None
+
+
+def configurations(ratios=BENCHMARK_RATIOS, class_weights=BENCHMARK_CLASS_WEIGHTS):
+    """`(name, ratio, class_weight)` for every strategy in the sweep."""
+    configs = [(f"undersample 1:{r}", r, None) for r in ratios]
+    for w in class_weights:
+        weight = w if w is None or isinstance(w, str) else {0: 1, 1: w}
+        configs.append((f"class_weight {w}", None, weight))
+    return configs
+
+
+def _undersample(y, ratio, rng):
+    # Row indices keeping every fraud and `ratio` genuine rows per fraud
+    fraud = np.flatnonzero(y == 1)
+    genuine = np.flatnonzero(y == 0)
+    n_keep = min(len(genuine), len(fraud) * ratio)
+    return np.sort(np.concatenate([fraud, rng.choice(genuine, n_keep, replace=False)]))
+
+
+def _fit(X, y, model_type, class_weight):
+    # Scaling is part of the fit, as in the saved pipeline
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X)
+    return scaler, train_model(X_train, y, model_type, class_weight=class_weight)
+
+
+def run_fold(config, fold, n_folds, model_type):
+    """Fit and score one configuration on one fold; return its metrics."""
+    name, ratio, class_weight = config
+    splits = StratifiedKFold(n_folds, shuffle=True, random_state=RANDOM_STATE)
+    train, test = list(splits.split(_X, _y))[fold]
+    if ratio is not None:
+        rng = np.random.RandomState(RANDOM_STATE + fold)
+        train = train[_undersample(_y[train], ratio, rng)]
+
+    with stage("cv_fit") as fit:
+        scaler, model = _fit(_X[train], _y[train], model_type, class_weight)
+
+    own_tracing = not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    try:
+        with stage("cv_fit_memory") as memory:
+            _fit(_X[train], _y[train], model_type, class_weight)
+    finally:
+        if own_tracing:
+            tracemalloc.stop()
+
+    proba = model.predict_proba(scaler.transform(_X[test]))[:, 1]
+    y_pred = (proba >= 0.5).astype(int)
+    return {
+        "config": name,
+        "fold": fold,
+        "train_rows": len(train),
+        "fit_seconds": fit.seconds,
+        "peak_mb": memory.peak_mb,
+        "pr_auc": average_precision_score(_y[test], proba),
+        "precision": precision_score(_y[test], y_pred, zero_division=0),
+        "recall": recall_score(_y[test], y_pred),
+    }
+
+
+def summarize(results, recall_target=RECALL_TARGET):
+    """Fold means and standard deviations per configuration, cheapest first."""
+    df = pd.DataFrame(results)
+    metrics = ["train_rows", "fit_seconds", "peak_mb", "pr_auc", "precision", "recall"]
+    summary = df.groupby("config", sort=False)[metrics].agg(["mean", "std"])
+    summary.columns = [f"{m}_{stat}" for m, stat in summary.columns]
+    summary["meets_target"] = summary["recall_mean"] >= recall_target
+    return summary.sort_values("fit_seconds_mean")
+
+
+def run_benchmark(model_type="logreg", n_folds=CV_FOLDS, workers=None):
+    """
+    Run the sweep for `model_type`, save the summary and return it.
+
+    `workers` defaults to the number of CPUs; with 1 everything runs in this
+    process, which must not be tracing allocations or the fit times are
+    traced too (`main.py` records benchmark runs without memory tracing).
+    """
+    configs = configurations()
+    tasks = [(c, fold) for c in configs for fold in range(n_folds)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    logging.info(
+        f"Benchmark: {len(configs)} configurations x {n_folds} folds "
+        f"of {model_type} on {workers} workers"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_arrays(tmp)
+        if workers == 1:
+            _load(*paths)
+            results = [run_fold(c, fold, n_folds, model_type) for c, fold in tasks]
+            _unload()
+        else:
+            with ProcessPoolExecutor(
+                workers, initializer=_load, initargs=paths
+            ) as pool:
+                futures = [
+                    pool.submit(run_fold, c, fold, n_folds, model_type)
+                    for c, fold in tasks
+                ]
+                results = [f.result() for f in futures]
+
+    summary = summarize(results)
+    os.makedirs(os.path.dirname(BENCHMARK_PATH), exist_ok=True)
+    summary.to_csv(BENCHMARK_PATH)
+    logging.info(f"Benchmark summary:\n{summary.to_string()}")
+
+    columns = ["train_rows", "fit_seconds", "peak_mb", "pr_auc", "recall"]
+    print(summary[[f"{c}_mean" for c in columns]].round(4).to_string())
+    passing = summary[summary["meets_target"]]
+    if len(passing):
+        print(
+            f"\nCheapest configuration with recall >= {RECALL_TARGET}: "
+            f"{passing.index[0]}"
+        )
+    else:
+        print(f"\nNo configuration reaches recall {RECALL_TARGET}")
+    print(f"Summary saved to {BENCHMARK_PATH}")
+    return summary
+
+
+def run_shard_report(shard_counts=SHARD_COUNTS):
+    """Compare single-process and sharded rf training; save and return the report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        _load(*_write_arrays(tmp))
+        X_train, X_test, y_train, y_test = train_test_split(
+            _X, _y, test_size=TEST_SIZE, stratify=_y, random_state=RANDOM_STATE
+        )
+        _unload()
+    metrics = {
+        "pr_auc": lambda m, X, y: average_precision_score(y, m.predict_proba(X)[:, 1]),
+        "f1": lambda m, X, y: f1_score(y, m.predict(X)),
+    }
+    logging.info(f"Shard report: {len(y_train)} training rows, shards {shard_counts}")
+    report = scaling_report(
+        RandomForestClassifier(n_estimators=100, random_state=RANDOM_STATE),
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        metrics,
+        shard_counts,
+    )
+
+    os.makedirs(os.path.dirname(SHARD_REPORT_PATH), exist_ok=True)
+    report.to_csv(SHARD_REPORT_PATH, index=False)
+    print(report.round(4).to_string(index=False))
+    print(f"Report saved to {SHARD_REPORT_PATH}")
+    return report
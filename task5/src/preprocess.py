@@ -1,47 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.utils import resample
-from src.config import DATA_PATH, TEST_SIZE, RANDOM_STATE
-import os
+from src.config import (
+    DATA_PATH,
+    TEST_SIZE,
+    RANDOM_STATE,
+    CHUNK_SIZE,
+    UNDERSAMPLE_RATIO,
+)
+import logging
+
+# The shared dataset loader lives in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.datasets import load_csv  # noqa: E402
+from common.instrument import stage, timed  # noqa: E402
 
+FEATURE_COLUMNS = [f"V{i}" for i in range(1, 29)] + ["Amount"]
 
+
+@timed("preprocess")
 def load_and_preprocess_data():
-    df = pd.read_csv(DATA_PATH)
-
-    # Create output folder if not exists
-    os.makedirs("outputs/plots", exist_ok=True)
-
-    # 💠 Plot class distribution before balancing
-    plt.figure(figsize=(6, 4))
-    sns.countplot(data=df, x="Class")
-    plt.title("Class Distribution Before Balancing")
-    plt.xlabel("Class (0 = Genuine, 1 = Fraud)")
-    plt.ylabel("Count")
-    plt.savefig("outputs/plots/class_distribution_before.png")
-    plt.close()
-
-    # Drop 'Time' and separate features and labels
-    X = df.drop(["Class", "Time"], axis=1)
-    y = df["Class"]
+    """
+    Undersample, scale and split creditcard.csv in memory.
 
-    # Correlation heatmap (sampled for performance)
-    corr_sample = df.sample(n=10000, random_state=RANDOM_STATE)
-    plt.figure(figsize=(16, 12))
-    sns.heatmap(corr_sample.drop(columns="Time").corr(), cmap="coolwarm", center=0)
-    plt.title("Feature Correlation Heatmap")
-    plt.savefig("outputs/plots/correlation_heatmap.png")
-    plt.close()
-
-    # Distribution of transaction amount
-    plt.figure(figsize=(6, 4))
-    sns.histplot(df["Amount"], bins=50, kde=True)
-    plt.title("Transaction Amount Distribution")
-    plt.xlabel("Amount")
-    plt.savefig("outputs/plots/amount_distribution.png")
-    plt.close()
+    Returns:
+        X_train, X_test, y_train, y_test, and the fitted `StandardScaler`.
+    """
+    # Memory-mapped from the columnar cache; 'Time' is never read
+    # (plots are rendered separately by src/report.py)
+    with stage("load"):
+        df = load_csv(DATA_PATH, columns=FEATURE_COLUMNS + ["Class"])
+    X = df.drop("Class", axis=1)
+    y = df["Class"]
 
     # Balance the dataset using undersampling
     df_combined = pd.concat([X, y], axis=1)
@@ -51,7 +46,7 @@ def load_and_preprocess_data():
     df_majority_downsampled = resample(
         df_majority,
         replace=False,
-        n_samples=len(df_minority) * 5,
+        n_samples=len(df_minority) * UNDERSAMPLE_RATIO,
         random_state=RANDOM_STATE,
     )
 
@@ -60,21 +55,109 @@ def load_and_preprocess_data():
         drop=True
     )
 
-    # 💠 Plot class distribution after balancing
-    plt.figure(figsize=(6, 4))
-    sns.countplot(data=df_balanced, x="Class")
-    plt.title("Class Distribution After Balancing")
-    plt.xlabel("Class (0 = Genuine, 1 = Fraud)")
-    plt.ylabel("Count")
-    plt.savefig("outputs/plots/class_distribution_after.png")
-    plt.close()
-
     # Split and scale
     X_bal = df_balanced.drop("Class", axis=1)
     y_bal = df_balanced["Class"]
+    # Fitted on the bare array, the same layout src/score.py feeds it
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X_bal)
+    X_scaled = scaler.fit_transform(X_bal.to_numpy())
 
-    return train_test_split(
+    X_train, X_test, y_train, y_test = train_test_split(
         X_scaled, y_bal, test_size=TEST_SIZE, random_state=RANDOM_STATE
     )
+    return X_train, X_test, y_train, y_test, scaler
+
+
+@timed("preprocess")
+def load_and_preprocess_data_streaming(chunksize=CHUNK_SIZE):
+    """
+    Out-of-core variant of `load_and_preprocess_data`.
+
+    The CSV is read twice in chunks of `chunksize` rows, so peak memory is
+    bounded by the chunk size (plus one int32 per genuine transaction for the
+    sampling permutation) instead of the file size. Features are kept as
+    float32. For the same `RANDOM_STATE` the selected rows, their order and the
+    train/test split are identical to the in-memory path; values differ only
+    by float32 rounding.
+    """
+    # Pass 1: read only the label column to count both classes
+    n_majority = n_minority = 0
+    for chunk in pd.read_csv(
+        DATA_PATH, usecols=["Class"], dtype={"Class": "int8"}, chunksize=chunksize
+    ):
+        frauds = int(chunk["Class"].sum())
+        n_minority += frauds
+        n_majority += len(chunk) - frauds
+    logging.info(f"Streaming: {n_majority} genuine, {n_minority} fraud rows")
+
+    # Draw the same majority positions `resample` would draw for this seed
+    n_keep = n_minority * UNDERSAMPLE_RATIO
+    if n_keep > n_majority:
+        raise ValueError(
+            f"Cannot sample {n_keep} genuine rows out of {n_majority} available"
+        )
+    order = np.arange(n_majority, dtype=np.int32 if n_majority < 2**31 else np.int64)
+    np.random.RandomState(RANDOM_STATE).shuffle(order)
+    order = order[:n_keep]
+    keep = np.sort(order)
+
+    # Pass 2: keep sampled genuine rows and every fraud row, chunk by chunk
+    dtypes = {c: "float32" for c in FEATURE_COLUMNS}
+    dtypes["Class"] = "int8"
+    majority_parts, minority_parts = [], []
+    seen = 0
+    for chunk in pd.read_csv(
+        DATA_PATH, usecols=FEATURE_COLUMNS + ["Class"], dtype=dtypes, chunksize=chunksize
+    ):
+        chunk = chunk[FEATURE_COLUMNS + ["Class"]]
+        is_fraud = chunk["Class"].to_numpy() == 1
+        genuine = chunk[~is_fraud]
+        lo, hi = np.searchsorted(keep, [seen, seen + len(genuine)])
+        majority_parts.append(genuine.iloc[keep[lo:hi] - seen])
+        minority_parts.append(chunk[is_fraud])
+        seen += len(genuine)
+
+    # Restore the permutation order, then shuffle exactly like the in-memory path
+    df_majority = pd.concat(majority_parts)
+    df_majority = df_majority.iloc[np.searchsorted(keep, order)]
+    df_balanced = pd.concat([df_majority, pd.concat(minority_parts)])
+    df_balanced = df_balanced.sample(frac=1, random_state=RANDOM_STATE).reset_index(
+        drop=True
+    )
+
+    # Fit the scaler incrementally so it never needs the whole sample at once
+    X_bal = df_balanced.drop("Class", axis=1)
+    y_bal = df_balanced["Class"]
+    scaler = StandardScaler()
+    for start in range(0, len(X_bal), chunksize):
+        scaler.partial_fit(X_bal.iloc[start : start + chunksize].to_numpy())
+    X_scaled = scaler.transform(X_bal.to_numpy())
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y_bal, test_size=TEST_SIZE, random_state=RANDOM_STATE
+    )
+    return X_train, X_test, y_train, y_test, scaler
+
+
+def iter_batches(path=DATA_PATH, chunksize=CHUNK_SIZE):
+    """
+    Yield unscaled `(X, y)` float32 batches from a labelled transaction CSV.
+
+    Genuine rows are undersampled inside each chunk to `UNDERSAMPLE_RATIO`
+    times the chunk's fraud count, so every batch keeps the training class mix.
+    """
+    rng = np.random.RandomState(RANDOM_STATE)
+    dtypes = {c: "float32" for c in FEATURE_COLUMNS}
+    dtypes["Class"] = "int8"
+    for chunk in pd.read_csv(
+        path, usecols=FEATURE_COLUMNS + ["Class"], dtype=dtypes, chunksize=chunksize
+    ):
+        y = chunk["Class"].to_numpy()
+        X = chunk[FEATURE_COLUMNS].to_numpy()
+        fraud = np.flatnonzero(y == 1)
+        genuine = np.flatnonzero(y == 0)
+        n_keep = min(len(genuine), max(len(fraud), 1) * UNDERSAMPLE_RATIO)
+        rows = np.sort(
+            np.concatenate([fraud, rng.choice(genuine, n_keep, replace=False)])
+        )
+        yield X[rows], y[rows]
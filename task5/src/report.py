@@ -0,0 +1,77 @@
+import logging
+import os
+
+import matplotlib
+
+matplotlib.use("Agg")  # render to files; never needs a display
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+from src.config import (  # noqa: E402
+    DATA_PATH,
+    PLOTS_DIR,
+    RANDOM_STATE,
+    UNDERSAMPLE_RATIO,
+)
+from src.utils import setup_logging  # noqa: E402
+
+
+def plot_class_distribution(counts, title, path):
+    plt.figure(figsize=(6, 4))
+    sns.barplot(x=counts.index.astype(str), y=counts.values)
+    plt.title(title)
+    plt.xlabel("Class (0 = Genuine, 1 = Fraud)")
+    plt.ylabel("Count")
+    plt.savefig(path)
+    plt.close()
+
+
+def generate_plots(data_path=DATA_PATH, out_dir=PLOTS_DIR):
+    """
+    Render the dataset plots. Runs in its own process (`python -m src.report`),
+    started by `main.py --plots`, so training never imports matplotlib/seaborn.
+    """
+    df = pd.read_csv(data_path)
+
+    # Create output folder if not exists
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 💠 Plot class distribution before balancing
+    counts = df["Class"].value_counts().sort_index()
+    plot_class_distribution(
+        counts,
+        "Class Distribution Before Balancing",
+        os.path.join(out_dir, "class_distribution_before.png"),
+    )
+
+    # Correlation heatmap (sampled for performance)
+    corr_sample = df.sample(n=min(10000, len(df)), random_state=RANDOM_STATE)
+    plt.figure(figsize=(16, 12))
+    sns.heatmap(corr_sample.drop(columns="Time").corr(), cmap="coolwarm", center=0)
+    plt.title("Feature Correlation Heatmap")
+    plt.savefig(os.path.join(out_dir, "correlation_heatmap.png"))
+    plt.close()
+
+    # Distribution of transaction amount
+    plt.figure(figsize=(6, 4))
+    sns.histplot(df["Amount"], bins=50, kde=True)
+    plt.title("Transaction Amount Distribution")
+    plt.xlabel("Amount")
+    plt.savefig(os.path.join(out_dir, "amount_distribution.png"))
+    plt.close()
+
+    # 💠 Plot class distribution after balancing (undersampling keeps every
+    # fraud row and UNDERSAMPLE_RATIO genuine rows per fraud row)
+    after = pd.Series({0: counts[1] * UNDERSAMPLE_RATIO, 1: counts[1]})
+    plot_class_distribution(
+        after,
+        "Class Distribution After Balancing",
+        os.path.join(out_dir, "class_distribution_after.png"),
+    )
+    logging.info(f"Plots saved to {out_dir}")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    generate_plots()
@@ -1,20 +1,172 @@
-import joblib
 import logging
-from sklearn.linear_model import LogisticRegression
+import os
+import sys
+from pathlib import Path
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestClassifier
-from src.config import MODEL_PATH
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.config import (
+    ARTIFACT_COMPRESS,
+    COST_FN,
+    COST_FP,
+    INCREMENTAL_TREES,
+    MODEL_PATH,
+    RANDOM_STATE,
+)
+from src.preprocess import FEATURE_COLUMNS
 
+# The shared artifact helpers live in common/ at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.artifacts import load_artifact, read_metadata, save_artifact  # noqa: E402
+from common.instrument import timed  # noqa: E402
+from common.sharding import train_sharded  # noqa: E402
 
-def train_model(X_train, y_train, model_type="logreg"):
+CLASSES = np.array([0, 1])
+
+
+@timed("fit")
+def train_model(
+    X_train, y_train, model_type="logreg", class_weight=None, shards=1, workers=None
+):
+    """
+    Fit a `model_type` classifier.
+
+    With `shards` > 1 (rf only) the rows are split into that many stratified
+    shards, sub-forests are fitted on them in `workers` processes and merged
+    into one forest; see `common/sharding.py`.
+    """
     logging.info(f"Training model: {model_type}")
+    if shards > 1 and model_type != "rf":
+        raise ValueError(f"Sharded training needs an rf model, not {model_type}")
     if model_type == "logreg":
-        model = LogisticRegression(max_iter=1000)
+        model = LogisticRegression(max_iter=1000, class_weight=class_weight)
     elif model_type == "rf":
-        model = RandomForestClassifier(n_estimators=100)
+        model = RandomForestClassifier(n_estimators=100, class_weight=class_weight)
+    elif model_type == "sgd":
+        model = SGDClassifier(
+            loss="log_loss", random_state=RANDOM_STATE, class_weight=class_weight
+        )
     else:
         raise ValueError("Invalid model type")
 
+    if shards > 1:
+        return train_sharded(
+            model, X_train, y_train, shards, workers, random_state=RANDOM_STATE
+        )
     model.fit(X_train, y_train)
-    joblib.dump(model, MODEL_PATH)
-    logging.info(f"Model saved to {MODEL_PATH}")
     return model
+
+
+def build_pipeline(model, scaler):
+    """The fitted scaler and model as one `Pipeline`, scaler first."""
+    return Pipeline([("scaler", scaler), ("model", model)])
+
+
+@timed("save")
+def save_model(model, scaler, threshold=0.5):
+    # One artifact, so scoring never refits or pairs a scaler by hand; the
+    # tuned threshold travels in its .meta.json sidecar
+    save_artifact(
+        build_pipeline(model, scaler),
+        MODEL_PATH,
+        compress=ARTIFACT_COMPRESS,
+        metadata={
+            "feature_names": FEATURE_COLUMNS,
+            "threshold": threshold,
+            "cost_fn": COST_FN,
+            "cost_fp": COST_FP,
+        },
+    )
+    logging.info(f"Pipeline saved to {MODEL_PATH} (threshold {threshold:.4f})")
+
+
+def load_model(mmap=False):
+    """
+    Return the saved scaler + model `Pipeline` and its decision threshold.
+
+    With `mmap=True` the arrays of an uncompressed artifact are memory-mapped
+    read-only, which suits scoring but not further training.
+    """
+    meta = read_metadata(MODEL_PATH) or {}
+    pipeline = load_artifact(MODEL_PATH, mmap=mmap)
+    if not isinstance(pipeline, Pipeline):
+        raise ValueError(
+            f"{MODEL_PATH} holds a bare {type(pipeline).__name__} saved before "
+            "the scaler + model pipeline format; retrain with `python main.py` "
+            "on data/creditcard.csv"
+        )
+    return pipeline, meta.get("threshold", 0.5)
+
+
+@timed("fit")
+def update_model(batches, model_type="sgd"):
+    """
+    Resume the saved scaler + model pipeline and update them with new (X, y) batches.
+
+    `sgd` is updated with `partial_fit`; `rf` grows `INCREMENTAL_TREES` new
+    trees per batch with `warm_start`, leaving the existing trees untouched.
+    Either way the cost of an update depends only on the new batches. The scaler
+    is never refit once the model has trained on its output: a resumed scaler
+    stays frozen, and a new one is fitted on the first batch and then frozen.
+    `batches` is usually a one-pass chunk iterator, so the first batch is used
+    instead of a separate scaling pass over all of them.
+    """
+    if model_type not in ("sgd", "rf"):
+        raise ValueError(
+            f"Model type {model_type} does not support incremental training"
+        )
+
+    threshold = 0.5
+    pipeline = load_artifact(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
+    if pipeline is not None and not isinstance(pipeline, Pipeline):
+        # Models saved before the scaler + model pipeline cannot be resumed
+        logging.warning(
+            f"{MODEL_PATH} holds a bare {type(pipeline).__name__}, not a scaler + "
+            f"model pipeline; it will be replaced by a new {model_type} model"
+        )
+        pipeline = None
+    resumed = pipeline is not None
+    if resumed:
+        threshold = (read_metadata(MODEL_PATH) or {}).get("threshold", 0.5)
+        scaler, model = pipeline["scaler"], pipeline["model"]
+        expected = SGDClassifier if model_type == "sgd" else RandomForestClassifier
+        if not isinstance(model, expected):
+            raise ValueError(
+                f"{MODEL_PATH} holds a {type(model).__name__}, not a {model_type} model"
+            )
+        logging.info(f"Resuming {type(model).__name__} from {MODEL_PATH}")
+    else:
+        if model_type == "sgd":
+            model = SGDClassifier(loss="log_loss", random_state=RANDOM_STATE)
+        else:
+            model = RandomForestClassifier(n_estimators=0, random_state=RANDOM_STATE)
+        scaler = StandardScaler()
+        logging.info(f"No saved model found, starting a new {model_type} model")
+
+    n_rows = 0
+    fit_scaler = not resumed
+    for X, y in batches:
+        if fit_scaler:
+            scaler.fit(X)
+            fit_scaler = False
+        # Batches are float32, but full training runs fit the model on float64
+        X = scaler.transform(X).astype(np.float64)
+        if isinstance(model, SGDClassifier):
+            model.partial_fit(X, y, classes=CLASSES)
+        else:
+            # Every tree needs both classes, otherwise predict_proba shapes differ
+            if len(np.unique(y)) < 2:
+                logging.info("Skipping batch with a single class for rf")
+                continue
+            model.set_params(
+                warm_start=True, n_estimators=model.n_estimators + INCREMENTAL_TREES
+            )
+            model.fit(X, y)
+        n_rows += len(y)
+
+    # Keep the tuned threshold; retune with a full training run if needed
+    save_model(model, scaler, threshold)
+    logging.info(f"Model updated on {n_rows} rows")
+    return model, scaler